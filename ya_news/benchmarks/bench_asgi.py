@@ -0,0 +1,115 @@
+"""
+Пропускная способность страниц чтения под ASGI и под WSGI.
+
+ASGI-приложение обслуживает запросы конкурентно в одном цикле событий,
+WSGI — пулом потоков того же размера. Запуск из каталога ya_news:
+    python -m benchmarks.bench_asgi --concurrency 32 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    override_settings, setup_test_environment
+)
+
+from benchmarks import use_memory_caches  # noqa: E402
+from news.models import Comment, News  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+
+
+def seed(news_count=20, comments_per_news=100):
+    author = get_user_model().objects.create(username='bench')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости. ' * 20)
+        for index in range(news_count)
+    )
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text='Комментарий. ' * 5)
+        for news in News.objects.all()
+        for _ in range(comments_per_news)
+    )
+    return list(News.objects.values_list('pk', flat=True))
+
+
+def urls_for(news_ids, total):
+    urls = ['/'] + [f'/news/{pk}/' for pk in news_ids]
+    return [urls[index % len(urls)] for index in range(total)]
+
+
+async def run_asgi(urls, concurrency):
+    queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+
+    async def worker():
+        client = AsyncClient()
+        while not queue.empty():
+            response = await client.get(queue.get_nowait())
+            assert response.status_code == 200, response.status_code
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def run_wsgi(urls, concurrency):
+    def fetch(url):
+        response = Client().get(url)
+        assert response.status_code == 200, response.status_code
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(fetch, urls))
+
+
+def measure(name, func, total):
+    cache.clear()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f'{name}: {total / elapsed:8.1f} запросов/с ({elapsed:.2f} с)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument(
+        '--without-page-cache', action='store_true',
+        help='замерить отрисовку страниц, а не попадания в кэш',
+    )
+    args = parser.parse_args()
+
+    setup_test_environment()
+    use_memory_caches()
+    if args.without_page_cache:
+        override_settings(CACHES={**settings.CACHES, 'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }}).enable()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        urls = urls_for(seed(), args.requests)
+        measure(
+            'WSGI', lambda: run_wsgi(urls, args.concurrency), len(urls)
+        )
+        measure(
+            'ASGI',
+            lambda: asyncio.run(run_asgi(urls, args.concurrency)),
+            len(urls),
+        )
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Комментарии под конкурентной записью: INSERT на каждый против буфера
+отложенной записи.
+
+Несколько потоков отправляют комментарии к одной новости; лимиты
+частоты на время замера сняты. После замера с буфером он
+останавливается, и проверяется, что сохранены все комментарии.
+Запуск из каталога ya_news:
+    python -m benchmarks.bench_comment_buffer --concurrency 8 --comments 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    override_settings, setup_test_environment
+)
+from django.urls import reverse  # noqa: E402
+
+from benchmarks import use_memory_caches  # noqa: E402
+from news.buffer import get_comment_buffer  # noqa: E402
+from news.models import Comment, News  # noqa: E402
+
+
+def post_comments(clients, url, total):
+    def post(index):
+        client = clients[index % len(clients)]
+        response = client.post(url, {'text': f'Комментарий {index}'})
+        assert response.status_code == 302, response.status_code
+
+    with ThreadPoolExecutor(len(clients)) as pool:
+        list(pool.map(post, range(total)))
+
+
+def measure(name, clients, url, total):
+    Comment.objects.all().delete()
+    started = time.perf_counter()
+    post_comments(clients, url, total)
+    elapsed = time.perf_counter() - started
+    print(f'{name:10} {total / elapsed:8.1f} комментариев/с ({elapsed:.2f} с)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--comments', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    use_memory_caches()
+    override_settings(NEWS_RATE_LIMITS={}).enable()
+    # Общая база в памяти блокирует таблицы целиком, поэтому для
+    # записей из нескольких потоков — файл с WAL, как в проекте.
+    directory = tempfile.TemporaryDirectory()
+    settings.DATABASES['default']['TEST']['NAME'] = os.path.join(
+        directory.name, 'bench.sqlite3'
+    )
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        news = News.objects.create(title='Новость', text='Текст')
+        url = reverse('news:detail', args=(news.pk,))
+        clients = []
+        for index in range(args.concurrency):
+            client = Client()
+            client.force_login(get_user_model().objects.create(
+                username=f'bench{index}'
+            ))
+            clients.append(client)
+
+        measure('без буфера', clients, url, args.comments)
+        with override_settings(NEWS_COMMENT_BUFFER=True):
+            measure('с буфером', clients, url, args.comments)
+            get_comment_buffer().stop()
+        saved = Comment.objects.count()
+        assert saved == args.comments, saved
+        news.refresh_from_db()
+        assert news.comment_count == saved, news.comment_count
+        print(f'сохранено после остановки буфера: {saved}')
+    finally:
+        runner.teardown_databases(old_config)
+        directory.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Сравнение проверки комментариев на запрещённые слова.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.bench_profanity --words 5000 --length 5000
+"""
+import argparse
+import random
+import string
+import timeit
+
+from news.profanity import ProfanityMatcher
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(rng, min_length=4, max_length=12):
+    length = rng.randint(min_length, max_length)
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def legacy_search(words, text):
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--length', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = [random_word(rng) for _ in range(args.words)]
+    tokens = []
+    while sum(len(token) + 1 for token in tokens) < args.length:
+        tokens.append(random_word(rng, 2, 9))
+        if rng.random() < 0.1:
+            tokens.append(rng.choice(string.punctuation))
+    text = ' '.join(tokens)
+    words = [word for word in words if word not in text]
+
+    build_time = timeit.timeit(
+        lambda: ProfanityMatcher(words), number=1
+    )
+    matcher = ProfanityMatcher(words)
+    assert matcher.search(text) == legacy_search(words, text)
+
+    legacy_time = min(timeit.repeat(
+        lambda: legacy_search(words, text), number=1, repeat=args.repeat
+    ))
+    matcher_time = min(timeit.repeat(
+        lambda: matcher.search(text), number=1, repeat=args.repeat
+    ))
+    print(f'слов: {len(words)}, длина текста: {len(text)}')
+    print(f'сборка автомата: {build_time * 1000:.2f} мс (один раз)')
+    print(f'цикл по BAD_WORDS: {legacy_time * 1000:.3f} мс')
+    print(f'автомат:           {matcher_time * 1000:.3f} мс')
+    print(f'ускорение: x{legacy_time / matcher_time:.1f}')
+
+
+if __name__ == '__main__':
+    main()
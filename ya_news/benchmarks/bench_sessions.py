@@ -0,0 +1,90 @@
+"""
+SQL-запросы и время авторизованного запроса: сессии и пользователь
+из базы против кэша.
+
+Профиль «база» — прежние настройки: сессии в django_session,
+пользователь через ModelBackend. Профиль «кэш» — настройки проекта.
+Запуск из каталога ya_news:
+    python -m benchmarks.bench_sessions --repeat 200
+"""
+import argparse
+import os
+import statistics
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext, override_settings, setup_test_environment
+)
+from django.urls import reverse  # noqa: E402
+
+from benchmarks import use_memory_caches  # noqa: E402
+from news.models import Comment, News  # noqa: E402
+
+PROFILES = {
+    'база': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': [
+            'django.contrib.auth.backends.ModelBackend'
+        ],
+    },
+    'кэш': {},
+}
+
+
+def measure(url, repeat):
+    """Среднее число SQL-запросов и медиана времени в миллисекундах."""
+    user = get_user_model().objects.get()
+    client = Client()
+    client.force_login(user)
+    counts, durations = [], []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            durations.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+        counts.append(len(queries))
+    return statistics.fmean(counts), statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    use_memory_caches()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        user = get_user_model().objects.create(username='Читатель')
+        news = News.objects.create(title='Новость', text='Текст')
+        Comment.objects.create(news=news, author=user, text='Комментарий')
+        comment = Comment.objects.get()
+        urls = {
+            'news:detail': reverse('news:detail', args=(news.pk,)),
+            'news:edit': reverse('news:edit', args=(comment.pk,)),
+        }
+        for name, url in urls.items():
+            for profile, overrides in PROFILES.items():
+                with override_settings(**overrides):
+                    queries, median = measure(url, args.repeat)
+                print(
+                    f'{name:12} {profile:5} '
+                    f'{queries:5.2f} запросов  {median:7.3f} мс'
+                )
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
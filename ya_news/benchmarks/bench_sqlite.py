@@ -0,0 +1,153 @@
+"""
+Нагрузочная проверка профиля SQLite из settings.DATABASES.
+
+Писатели в транзакции читают новость и добавляют комментарий, читатели
+в это время запрашивают ленту. Сравниваются «голый» sqlite3 и профиль
+проекта (WAL, busy_timeout, BEGIN IMMEDIATE). Каждый профиль
+проверяется в отдельном процессе на временном файле базы. Запуск из
+каталога ya_news:
+    python -m benchmarks.bench_sqlite --writers 8 --readers 8 --seconds 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+
+PROFILES = ('bare', 'project')
+
+
+def setup_django(profile, directory):
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    django.setup()
+
+    from django.conf import settings
+    from django.core.management import call_command
+
+    database = settings.DATABASES['default']
+    database['NAME'] = os.path.join(directory, f'{profile}.sqlite3')
+    if profile == 'bare':
+        database['OPTIONS'] = {}
+        database['CONN_MAX_AGE'] = 0
+    call_command('migrate', verbosity=0)
+
+
+class StressRun:
+    """Писатели и читатели, работающие с одной базой одновременно."""
+
+    def __init__(self, args):
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+
+        from news.models import News
+
+        self.args = args
+        self.author = get_user_model().objects.create(username='stress')
+        self.news_ids = [
+            News.objects.create(title=f'Новость {index}', text='Текст').pk
+            for index in range(10)
+        ]
+        connection.close()
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.stats = {'writes': 0, 'reads': 0, 'locked': 0}
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def loop(self, operation, key):
+        from django.db import OperationalError, connection
+
+        while not self.stop.is_set():
+            try:
+                operation()
+                self.count(key)
+            except OperationalError:
+                self.count('locked')
+        connection.close()
+
+    def write(self, news_id):
+        from django.db import transaction
+
+        from news.models import Comment, News
+
+        with transaction.atomic():
+            news = News.objects.get(pk=news_id)
+            Comment.objects.create(
+                news=news, author=self.author, text='Комментарий'
+            )
+
+    def read(self):
+        from django.conf import settings
+
+        from news.models import News
+
+        list(News.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE])
+
+    def run(self):
+        writers = [
+            threading.Thread(target=self.loop, args=(
+                partial(self.write, self.news_ids[index % 10]), 'writes'
+            ))
+            for index in range(self.args.writers)
+        ]
+        readers = [
+            threading.Thread(target=self.loop, args=(self.read, 'reads'))
+            for _ in range(self.args.readers)
+        ]
+        for thread in writers + readers:
+            thread.start()
+        time.sleep(self.args.seconds)
+        self.stop.set()
+        for thread in writers + readers:
+            thread.join()
+        for key in ('writes', 'reads'):
+            self.stats[f'{key}_per_second'] = round(
+                self.stats[key] / self.args.seconds, 1
+            )
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--worker', choices=PROFILES, help=argparse.SUPPRESS)
+    parser.add_argument('--directory', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        setup_django(args.worker, args.directory)
+        print(json.dumps(StressRun(args).run()))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in PROFILES:
+            output = subprocess.check_output((
+                sys.executable, '-m', 'benchmarks.bench_sqlite',
+                '--worker', profile, '--directory', directory,
+                '--writers', str(args.writers),
+                '--readers', str(args.readers),
+                '--seconds', str(args.seconds),
+            ), text=True)
+            results[profile] = json.loads(output.strip().splitlines()[-1])
+    for profile, stats in results.items():
+        print(
+            f'{profile:8} записей/с: {stats["writes_per_second"]:8}  '
+            f'чтений/с: {stats["reads_per_second"]:8}  '
+            f'ошибок блокировки: {stats["locked"]}'
+        )
+    print(json.dumps(results, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
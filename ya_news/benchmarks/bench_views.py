@@ -0,0 +1,130 @@
+"""
+Замеры горячих страниц YaNews на нескольких масштабах данных.
+
+Для каждого масштаба база заполняется командой seed_data, затем каждая
+страница запрашивается --repeat раз; лимиты частоты на время замера
+сняты. Результаты пишутся в JSON, чтобы их можно было сравнивать
+между коммитами. Запуск из каталога ya_news:
+    python -m benchmarks.bench_views --scales 100,1000 --output out.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from io import StringIO
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext, override_settings, setup_test_environment
+)
+from django.urls import reverse  # noqa: E402
+
+from benchmarks import use_memory_caches  # noqa: E402
+from news.models import News  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ('git', 'rev-parse', '--short', 'HEAD'), text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timed(request, repeat):
+    """Время одного запроса в миллисекундах и число SQL-запросов."""
+    durations = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = request()
+            durations.append((time.perf_counter() - started) * 1000)
+        assert response.status_code < 400, response.status_code
+    durations.sort()
+    return {
+        'mean_ms': round(statistics.fmean(durations), 3),
+        'median_ms': round(statistics.median(durations), 3),
+        'p95_ms': round(durations[int(0.95 * (len(durations) - 1))], 3),
+        'queries': len(queries),
+    }
+
+
+def run_scale(scale, repeat):
+    call_command('flush', interactive=False, verbosity=0)
+    call_command(
+        'seed_data',
+        users=max(10, scale // 10),
+        news=scale,
+        comments=scale * 10,
+        stdout=StringIO(),
+    )
+    client = Client()
+    client.force_login(get_user_model().objects.first())
+    # Самая обсуждаемая новость — худший случай для страницы новости.
+    news = News.objects.order_by('-comment_count').first()
+    detail_url = reverse('news:detail', args=(news.pk,))
+    return {
+        'news:home': timed(
+            lambda: client.get(reverse('news:home')), repeat
+        ),
+        'news:detail': timed(lambda: client.get(detail_url), repeat),
+        'news:detail POST': timed(
+            lambda: client.post(detail_url, {'text': 'Замер'}), repeat
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', default='100,1000,10000')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', help='файл для JSON, по умолчанию stdout')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    use_memory_caches()
+    override_settings(NEWS_RATE_LIMITS={}).enable()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        results = {
+            'project': 'ya_news',
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'repeat': args.repeat,
+            'scales': {},
+        }
+        for scale in map(int, args.scales.split(',')):
+            print(f'масштаб {scale}…', file=sys.stderr)
+            results['scales'][str(scale)] = run_scale(scale, args.repeat)
+    finally:
+        runner.teardown_databases(old_config)
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
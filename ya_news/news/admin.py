@@ -1,15 +1,125 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models.expressions import RawSQL
+from django.forms.models import BaseInlineFormSet
 
 from .models import Comment, News
+from .search import FTS_TABLE, build_match_query
 
+COMMENTS_PAGE_PARAM = 'comments_page'
+MATCH_IDS_SQL = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
 
-class CommentInline(admin.StackedInline):
+
+class CommentPageFormSet(BaseInlineFormSet):
+    """
+    Одна страница комментариев новости вместо всех сразу.
+
+    При сохранении страница собирается заново не по смещению:
+    за время правки могли добавиться комментарии, и смещение указало бы
+    на другие строки. Берём комментарии этой новости с id из формы.
+    """
+    page = 1
+    per_page = 20
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            queryset = super().get_queryset()
+            if self.is_bound:
+                self._queryset = queryset.filter(pk__in=self.submitted_ids())
+            else:
+                start = (self.page - 1) * self.per_page
+                self._queryset = queryset[start:start + self.per_page]
+        return self._queryset
+
+    def submitted_ids(self):
+        pk_name = self.model._meta.pk.name
+        ids = []
+        for index in range(self.initial_form_count()):
+            value = self.data.get(f'{self.add_prefix(index)}-{pk_name}')
+            try:
+                ids.append(int(value))
+            except (TypeError, ValueError):
+                continue
+        return ids
+
+    ellipsis = Paginator.ELLIPSIS
+
+    def page_links(self):
+        """
+        Номера страниц для навигации под таблицей комментариев.
+
+        Число комментариев берём из счётчика новости, без COUNT.
+        """
+        paginator = Paginator(
+            range(self.instance.comment_count), self.per_page
+        )
+        if paginator.num_pages < 2:
+            return ()
+        return paginator.get_elided_page_range(self.page)
+
+
+class CommentInline(admin.TabularInline):
+    """
+    Комментарии новости постранично, новые — первыми.
+
+    Номер страницы передаётся параметром comments_page в адресе
+    страницы новости. Автор показывается без виджета выбора:
+    виджет в каждой строке искал бы автора отдельным запросом.
+    Новые комментарии добавляются в CommentAdmin.
+    """
     model = Comment
     extra = 0
+    formset = CommentPageFormSet
+    fields = ('author', 'text', 'created')
+    readonly_fields = ('author', 'created')
+    ordering = ('-created', '-id')
+    template = 'admin/news/comment_inline.html'
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('author')
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        try:
+            page = int(request.GET.get(COMMENTS_PAGE_PARAM, 1))
+        except ValueError:
+            page = 1
+        formset.page = max(page, 1)
+        formset.per_page = settings.NEWS_ADMIN_COMMENTS_PER_PAGE
+        return formset
 
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
+    """
+    Новости со счётчиком комментариев и поиском по индексу FTS5.
+
+    Счётчик comment_count хранится в самой новости, поэтому список
+    обходится без подсчёта комментариев.
+    """
+    list_display = ('title', 'date', 'comment_count')
+    search_fields = ('title',)
+    show_full_result_count = False
     inlines = [
         CommentInline,
     ]
+
+    def get_search_results(self, request, queryset, search_term):
+        match = build_match_query(search_term)
+        if not match:
+            return queryset, False
+        return queryset.filter(id__in=RawSQL(MATCH_IDS_SQL, (match,))), False
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    """Комментарии; новость и автор выбираются по id, без списков."""
+    list_display = ('id', 'news', 'author', 'created')
+    list_select_related = ('news', 'author')
+    raw_id_fields = ('news', 'author')
+    ordering = ('-id',)
+    show_full_result_count = False
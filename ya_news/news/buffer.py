@@ -0,0 +1,209 @@
+"""
+Отложенная запись комментариев для пиков нагрузки.
+
+При NEWS_COMMENT_BUFFER = True проверенный комментарий не пишется
+в базу сразу, а встаёт в очередь процесса. Фоновый поток раз
+в NEWS_COMMENT_BUFFER_INTERVAL секунд или как только набралась пачка
+NEWS_COMMENT_BUFFER_BATCH_SIZE сохраняет очередь через bulk_create:
+одна транзакция SQLite на пачку вместо транзакции на комментарий.
+bulk_create не вызывает сигналы, поэтому счётчики комментариев
+и кэш страниц обновляем здесь же.
+
+Очередь ограничена NEWS_COMMENT_BUFFER_SIZE. Когда она полна, запрос
+ждёт места до NEWS_COMMENT_BUFFER_PUT_TIMEOUT секунд, а затем сохраняет
+комментарий сам, как без буфера: при перегрузке пишущие замедляются,
+а очередь не растёт.
+
+Комментарии в очереди пронумерованы, и буфер помнит номер последнего
+комментария каждого автора. Перед показом страницы новости автору
+очередь сохраняется до этого номера, так что свой комментарий автор
+видит сразу. Очередь у каждого процесса своя: гарантия действует,
+пока запросы автора обслуживает тот же процесс (один воркер или
+«липкие» сессии). При завершении процесса очередь сохраняется
+обработчиком atexit.
+"""
+import atexit
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.db import (
+    DatabaseError, IntegrityError, close_old_connections, connection,
+    transaction
+)
+from django.db.models import Case, F, Value, When
+
+from .cache import invalidate_pages
+from .models import Comment, News
+
+
+def save_comments(comments):
+    """
+    Сохраняем пачку комментариев одной транзакцией.
+
+    Если новость удалили, пока комментарий ждал в очереди, пачка
+    не сохранится — тогда пишем по одному и пропускаем такие.
+    """
+    counts = Counter(comment.news_id for comment in comments)
+    try:
+        with transaction.atomic():
+            Comment.objects.bulk_create(comments)
+            News.objects.filter(pk__in=counts).update(
+                comment_count=F('comment_count') + Case(
+                    *(When(pk=pk, then=Value(count))
+                      for pk, count in counts.items()),
+                    default=Value(0),
+                )
+            )
+    except IntegrityError:
+        for comment in comments:
+            comment.pk = None
+            comment._state.adding = True
+            try:
+                with transaction.atomic():
+                    comment.save()
+            except IntegrityError:
+                continue
+        return
+    for news_id in counts:
+        invalidate_pages(news_id)
+
+
+class CommentBuffer:
+    """Ограниченная очередь комментариев и поток, сохраняющий её."""
+
+    def __init__(self, size, batch_size, interval):
+        self.size = size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.pending = deque()
+        # Номер последнего комментария в очереди у каждого автора.
+        self.authors = {}
+        self.last_ticket = 0
+        self.flushed_ticket = 0
+        self.stopped = False
+        self.worker = None
+        self.condition = threading.Condition()
+        # Очередь сохраняет один поток за раз — в порядке номеров.
+        self.flush_lock = threading.Lock()
+
+    def put(self, comment, timeout):
+        """
+        Ставим комментарий в очередь; возвращаем его номер.
+
+        None — места не дождались или буфер остановлен: комментарий
+        нужно сохранить самому.
+        """
+        with self.condition:
+            has_room = self.condition.wait_for(
+                lambda: self.stopped or len(self.pending) < self.size,
+                timeout,
+            )
+            if not has_room or self.stopped:
+                return None
+            self.last_ticket += 1
+            self.pending.append((self.last_ticket, comment))
+            self.authors[comment.author_id] = self.last_ticket
+            if self.worker is None:
+                self.worker = threading.Thread(
+                    target=self.run, name='comment-buffer', daemon=True
+                )
+                self.worker.start()
+            if len(self.pending) >= self.batch_size:
+                self.condition.notify_all()
+            return self.last_ticket
+
+    def has_pending(self, author_id):
+        return author_id in self.authors
+
+    def flush_for(self, author_id):
+        """Сохраняем очередь, если в ней есть комментарии автора."""
+        ticket = self.authors.get(author_id)
+        if ticket is not None and ticket > self.flushed_ticket:
+            self.flush()
+
+    def flush(self):
+        """
+        Сохраняем всё, что в очереди, пачками.
+
+        Пачку, которую не удалось сохранить, возвращаем в начало
+        очереди, а ошибку пробрасываем.
+        """
+        with self.flush_lock:
+            while True:
+                with self.condition:
+                    batch = [
+                        self.pending.popleft() for _ in range(
+                            min(self.batch_size, len(self.pending))
+                        )
+                    ]
+                if not batch:
+                    return
+                try:
+                    save_comments([comment for _, comment in batch])
+                except DatabaseError:
+                    with self.condition:
+                        self.pending.extendleft(reversed(batch))
+                    raise
+                with self.condition:
+                    self.flushed_ticket = batch[-1][0]
+                    for ticket, comment in batch:
+                        if self.authors.get(comment.author_id) == ticket:
+                            del self.authors[comment.author_id]
+                    self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: (
+                        self.stopped or len(self.pending) >= self.batch_size
+                    ),
+                    self.interval,
+                )
+                if self.stopped:
+                    break
+            close_old_connections()
+            try:
+                self.flush()
+            except DatabaseError:
+                # Пачка осталась в очереди; повторим после паузы.
+                time.sleep(self.interval)
+        connection.close()
+
+    def stop(self):
+        """Останавливаем поток и сохраняем остаток очереди."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.worker is not None:
+            self.worker.join()
+        self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_comment_buffer():
+    """Буфер процесса; создаётся при первом обращении."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = CommentBuffer(
+                size=settings.NEWS_COMMENT_BUFFER_SIZE,
+                batch_size=settings.NEWS_COMMENT_BUFFER_BATCH_SIZE,
+                interval=settings.NEWS_COMMENT_BUFFER_INTERVAL,
+            )
+            atexit.register(_buffer.stop)
+        return _buffer
+
+
+def save_comment(comment):
+    """Сохраняем комментарий через буфер, если он включён, иначе сразу."""
+    if settings.NEWS_COMMENT_BUFFER and get_comment_buffer().put(
+        comment, settings.NEWS_COMMENT_BUFFER_PUT_TIMEOUT
+    ) is not None:
+        return
+    comment.save()
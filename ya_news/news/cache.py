@@ -0,0 +1,191 @@
+import hashlib
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+    quote_etag
+)
+from django.utils.http import http_date
+
+PAGE_CACHE_PREFIX = 'news:page'
+HOME_PAGE_KEY = f'{PAGE_CACHE_PREFIX}:home'
+
+
+VERSION_PREFIX = f'{PAGE_CACHE_PREFIX}:version'
+GLOBAL_VERSION_KEY = f'{VERSION_PREFIX}:all'
+
+
+def detail_page_key(news_id):
+    return f'{PAGE_CACHE_PREFIX}:detail:{news_id}'
+
+
+def version_key(page_key):
+    return f'{VERSION_PREFIX}:{page_key}'
+
+
+def invalidate_pages(news_id=None, home=True):
+    """
+    Удаляем из кэша страницы, которые зависят от изменённой новости,
+    и их версии для валидаторов ETag и Last-Modified.
+
+    Без news_id (массовые изменения) меняется и общая версия: она
+    входит в валидаторы всех страниц.
+    """
+    keys = [HOME_PAGE_KEY] if home else []
+    if news_id is not None:
+        keys.append(detail_page_key(news_id))
+    else:
+        keys.append(GLOBAL_VERSION_KEY)
+    cache.delete_many(keys + [version_key(key) for key in keys])
+
+
+async def _aget_version(key):
+    """
+    Время последнего изменения по мнению кэша, в секундах.
+
+    Версия создаётся при первом запросе после сброса, поэтому она
+    не раньше самого изменения. Потерянная (например, после
+    перезапуска) версия просто создаётся заново — валидаторы
+    меняются, и клиенты получают страницу целиком.
+    """
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+# Счётчики живут в памяти процесса: запись в общий файловый кэш
+# на каждое попадание стоила бы дороже самого попадания.
+_stats = Counter()
+
+
+def get_page_cache_stats():
+    """Счётчики попаданий и промахов кэша страниц в этом процессе."""
+    hits = _stats['hits']
+    misses = _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def _is_cacheable(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Точное значение — для записи в кэш страниц вместе с ответом.
+    response.last_modified = last_modified
+    return response
+
+
+class AnonymousPageCacheMixin:
+    """
+    Кэширует готовую страницу для анонимных читателей и отвечает
+    304 Not Modified на условные запросы.
+
+    Представление реализует корутину get_page(), возвращающую уже
+    отрисованный ответ, get_page_cache_key() и корутину
+    aget_page_state(): один агрегирующий запрос к базе, описывающий
+    состояние страницы, и время её последнего изменения. Из них
+    и версий в кэше складываются ETag и Last-Modified — без
+    отрисовки шаблона. Кэшированная страница хранится вместе
+    со своими валидаторами, так что попадание в кэш обходится
+    без базы. Авторизованные пользователи и запросы с GET-параметрами
+    всегда получают свежую страницу. Устаревшие записи удаляются
+    сигналами в news.signals.
+    """
+    page_cache_timeout = None
+
+    def get_page_cache_key(self):
+        raise NotImplementedError
+
+    async def get_page(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    async def aget_page_state(self):
+        raise NotImplementedError
+
+    async def aget_validators(self, request):
+        """
+        Валидаторы ETag и Last-Modified страницы.
+
+        Для пользователя в ETag входят его id и секрет CSRF: ссылки
+        редактирования и токен формы у каждого свои.
+        """
+        state, last_modified = await self.aget_page_state()
+        versions = [
+            await _aget_version(GLOBAL_VERSION_KEY),
+            await _aget_version(version_key(self.get_page_cache_key())),
+        ]
+        viewer = None
+        if request.user.is_authenticated:
+            viewer = (request.user.pk, request.META.get('CSRF_COOKIE'))
+        digest = hashlib.sha1(repr(
+            (state, versions, viewer, request.GET.urlencode())
+        ).encode()).hexdigest()
+        # HTTP-дата точна до секунды, сравнения — тоже в секундах.
+        return (
+            quote_etag(digest),
+            int(max(last_modified.timestamp(), *versions)),
+        )
+
+    async def get_fresh_page(self, request, *args, **kwargs):
+        etag, last_modified = await self.aget_validators(request)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return _set_validators(not_modified, etag, last_modified)
+        response = await self.get_page(request, *args, **kwargs)
+        return _set_validators(response, etag, last_modified)
+
+    async def get(self, request, *args, **kwargs):
+        # Пользователь нужен шаблонам, загружаем его заранее асинхронно.
+        request.user = await request.auser()
+        if request.user.is_authenticated or request.GET:
+            response = await self.get_fresh_page(request, *args, **kwargs)
+            patch_cache_control(response, private=True)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        key = self.get_page_cache_key()
+        cached = await cache.aget(key)
+        if cached is not None:
+            _stats['hits'] += 1
+            content, content_type, etag, last_modified = cached
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            ) or HttpResponse(content, content_type=content_type)
+            _set_validators(response, etag, last_modified)
+            response['X-Page-Cache'] = 'HIT'
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        _stats['misses'] += 1
+        response = await self.get_fresh_page(request, *args, **kwargs)
+        if _is_cacheable(request, response):
+            await cache.aset(
+                key,
+                (
+                    response.content, response['Content-Type'],
+                    response['ETag'], response.last_modified,
+                ),
+                self.page_cache_timeout or settings.NEWS_PAGE_CACHE_TIMEOUT,
+            )
+        response['X-Page-Cache'] = 'MISS'
+        patch_vary_headers(response, ('Cookie',))
+        return response
@@ -0,0 +1,142 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from news.cache import invalidate_pages
+from news.models import News
+
+FORMATS = ('jsonl', 'csv')
+# Дату обновляем, только если она есть в строке: иначе News подставит
+# сегодняшнюю и старая новость переедет наверх ленты.
+UPSERT_FIELDS = ('title', 'text')
+DATED_UPSERT_FIELDS = UPSERT_FIELDS + ('date',)
+
+
+def read_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает новости из JSONL или CSV (файл или stdin). '
+        'Поля: title, text, date (ГГГГ-ММ-ДД, необязательно), '
+        'external_id (необязательно, по нему выполняется upsert).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='путь к файлу, «-» — стандартный ввод',
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='формат данных, по умолчанию — по расширению файла',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='строк в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        data_format = options['format'] or path.rsplit('.', 1)[-1].lower()
+        if data_format not in FORMATS:
+            raise CommandError(
+                'Не удалось определить формат, укажите --format.'
+            )
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+
+        reader = read_jsonl if data_format == 'jsonl' else read_csv
+        stream = (
+            sys.stdin if path == '-'
+            else open(path, encoding='utf-8', newline='')
+        )
+        self.verbosity = options['verbosity']
+        started = time.perf_counter()
+        self.imported = self.skipped = 0
+        try:
+            rows = enumerate(reader(stream), start=1)
+            while batch := list(islice(rows, batch_size)):
+                self.save_batch(batch)
+                self.report_progress(started)
+        except (json.JSONDecodeError, csv.Error) as error:
+            raise CommandError(f'Ошибка разбора входных данных: {error}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if self.imported:
+                invalidate_pages()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено: {self.imported}, пропущено: {self.skipped}, '
+            f'{self.imported / elapsed if elapsed else 0:.0f} строк/с'
+        ))
+
+    def build_news(self, row):
+        """Превращаем строку в News или сообщаем, почему это невозможно."""
+        if not isinstance(row, dict):
+            raise ValidationError('строка должна быть объектом')
+        news = News(
+            title=row.get('title') or '',
+            text=row.get('text') or '',
+            external_id=row.get('external_id') or None,
+        )
+        if row.get('date'):
+            news.date = row['date']
+        news.clean_fields(exclude=('comment_count',))
+        return news
+
+    def save_batch(self, batch):
+        new_news = []
+        upserts = {}
+        for number, row in batch:
+            try:
+                news = self.build_news(row)
+            except ValidationError as error:
+                self.skipped += 1
+                self.stderr.write(f'Строка {number} пропущена: {error}')
+                continue
+            if news.external_id is None:
+                new_news.append(news)
+            else:
+                # Повтор внутри пачки: побеждает последняя версия.
+                upserts[news.external_id] = (news, bool(row.get('date')))
+        groups = {DATED_UPSERT_FIELDS: [], UPSERT_FIELDS: []}
+        for news, has_date in upserts.values():
+            groups[
+                DATED_UPSERT_FIELDS if has_date else UPSERT_FIELDS
+            ].append(news)
+        with transaction.atomic():
+            News.objects.bulk_create(new_news)
+            for update_fields, group in groups.items():
+                News.objects.bulk_create(
+                    group,
+                    update_conflicts=True,
+                    unique_fields=('external_id',),
+                    update_fields=update_fields,
+                )
+        self.imported += len(new_news) + len(upserts)
+
+    def report_progress(self, started):
+        if self.verbosity < 2:
+            return
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'… {self.imported} строк, {self.imported / elapsed:.0f} строк/с'
+        )
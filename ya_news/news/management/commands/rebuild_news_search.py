@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from news.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Переиндексирует все новости для полнотекстового поиска.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='новостей в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано новостей: {indexed}')
+        )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from news.cache import invalidate_pages
+from news.models import Comment, News
+
+
+def comment_count_subquery():
+    """Подзапрос с фактическим количеством комментариев новости."""
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(news=OuterRef('pk'))
+            .order_by()
+            .values('news')
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает News.comment_count по таблице комментариев. '
+        'Нужна после массовых вставок в обход ORM-сигналов.'
+    )
+
+    def handle(self, *args, **options):
+        drifted = News.objects.exclude(
+            comment_count=comment_count_subquery()
+        )
+        updated = drifted.update(comment_count=comment_count_subquery())
+        if updated:
+            invalidate_pages()
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счётчиков: {updated}')
+        )
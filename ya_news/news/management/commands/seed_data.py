@@ -0,0 +1,129 @@
+import random
+import uuid
+from datetime import date, timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from news.models import Comment, News
+
+WORDS = (
+    'новость', 'город', 'жители', 'сегодня', 'вчера', 'эксперты',
+    'проект', 'решение', 'власти', 'погода', 'дорога', 'школа',
+    'спорт', 'команда', 'матч', 'победа', 'рынок', 'цены', 'рост',
+    'снижение', 'блог', 'интернет', 'популярность', 'мир', 'наука',
+    'открытие', 'учёные', 'космос', 'кино', 'премьера', 'зрители',
+    'важно', 'быстро', 'впервые', 'снова', 'очень', 'большой', 'новый',
+)
+
+
+def sentence(rng, min_words, max_words):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize() + '.'
+
+
+def paragraph(rng, mean_length):
+    """Текст со случайной длиной около mean_length символов."""
+    target = max(20, int(rng.lognormvariate(0, 0.6) * mean_length))
+    sentences = []
+    length = 0
+    while length < target:
+        sentences.append(sentence(rng, 4, 14))
+        length += len(sentences[-1]) + 1
+    return ' '.join(sentences)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями, новостями '
+        'и комментариями для нагрузочных замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--news', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 and options['comments']:
+            raise CommandError('Для комментариев нужен хотя бы один автор.')
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        users = self.create_users(options['users'], batch_size)
+        news_ids = self.create_news(rng, options['news'], batch_size)
+        self.create_comments(
+            rng, options['comments'], users, news_ids, batch_size
+        )
+        call_command('recount_comments', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(users)}, новостей {len(news_ids)}, '
+            f'комментариев {options["comments"] if news_ids else 0}'
+        ))
+
+    def create_users(self, count, batch_size):
+        """
+        Пользователи с префиксом имени, своим у каждого запуска:
+        повторный запуск с тем же --seed не должен занять те же имена.
+        """
+        User = get_user_model()
+        prefix = f'seed-{uuid.uuid4().hex[:6]}'
+        password = make_password(None)
+        for batch in batched(range(count), batch_size):
+            User.objects.bulk_create(
+                User(username=f'{prefix}-{index}', password=password)
+                for index in batch
+            )
+        return list(
+            User.objects.filter(username__startswith=prefix)
+            .values_list('pk', flat=True)
+        )
+
+    def create_news(self, rng, count, batch_size):
+        today = date.today()
+        created_ids = []
+        for batch in batched(range(count), batch_size):
+            with transaction.atomic():
+                created = News.objects.bulk_create(
+                    News(
+                        title=sentence(rng, 2, 5)[:50],
+                        text=paragraph(rng, 600),
+                        date=today - timedelta(days=rng.randrange(365)),
+                    )
+                    for _ in batch
+                )
+            created_ids.extend(news.pk for news in created)
+        return created_ids
+
+    def create_comments(self, rng, count, users, news_ids, batch_size):
+        """
+        Распределяем комментарии по закону Ципфа.
+
+        Несколько популярных новостей собирают большую часть обсуждения,
+        как и в реальной ленте.
+        """
+        if not news_ids:
+            return
+        weights = [1 / rank for rank in range(1, len(news_ids) + 1)]
+        for batch in batched(range(count), batch_size):
+            targets = rng.choices(news_ids, weights=weights, k=len(batch))
+            with transaction.atomic():
+                Comment.objects.bulk_create(
+                    Comment(
+                        news_id=news_id,
+                        author_id=rng.choice(users),
+                        text=paragraph(rng, 150),
+                    )
+                    for news_id in targets
+                )
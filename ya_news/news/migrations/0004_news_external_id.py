@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_comment_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True, verbose_name='Идентификатор во внешнем источнике'),
+        ),
+    ]
@@ -4,13 +4,85 @@ from django.conf import settings
 from django.db import models
 
 
-class News(models.Model):
+class ChangeTrackingMixin:
+    """
+    Запоминаем значения полей, загруженные из базы.
+
+    save() загруженного объекта пишет только изменённые поля
+    (и поля с auto_now), а если ничего не изменилось — не обращается
+    к базе вовсе. Явно переданный update_fields не трогаем.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_changed_fields(self):
+        """Имена полей, изменённых с момента загрузки или сохранения."""
+        deferred = self.get_deferred_fields()
+        changed = set()
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname in deferred:
+                continue
+            # Поле, догруженное после отложенной загрузки, не сравнить
+            # с исходным значением — считаем его изменённым.
+            if (
+                field.attname not in self._loaded_values
+                or getattr(self, field.attname)
+                != self._loaded_values[field.attname]
+            ):
+                changed.add(field.name)
+        return changed
+
+    def save(self, *args, **kwargs):
+        tracked = (
+            not args
+            and not self._state.adding
+            and not kwargs.get('force_insert')
+            and 'update_fields' not in kwargs
+            and hasattr(self, '_loaded_values')
+        )
+        if tracked:
+            changed = self.get_changed_fields()
+            if not changed:
+                return
+            kwargs['update_fields'] = changed | {
+                field.name for field in self._meta.concrete_fields
+                if getattr(field, 'auto_now', False)
+            }
+        super().save(*args, **kwargs)
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
+
+
+class News(ChangeTrackingMixin, models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    external_id = models.CharField(
+        'Идентификатор во внешнем источнике',
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('date',), name='news_date_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -18,7 +90,7 @@ class News(models.Model):
         return self.title
 
 
-class Comment(models.Model):
+class Comment(ChangeTrackingMixin, models.Model):
     news = models.ForeignKey(
         News,
         on_delete=models.CASCADE
@@ -31,7 +103,13 @@ class Comment(models.Model):
     created = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ('created',)
+        ordering = ('created', 'id')
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
@@ -0,0 +1,90 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.db.models import Q
+
+from .models import Comment
+
+CURSOR_SEPARATOR = '|'
+
+
+def pack_cursor(*parts):
+    """Упаковываем значения ключа сортировки в строку для URL."""
+    raw = CURSOR_SEPARATOR.join(str(part) for part in parts)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def unpack_cursor(cursor, *types):
+    """
+    Распаковываем курсор, приводя части к типам из types.
+
+    Испорченный курсор — ошибка клиента, а не сервера.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        parts = raw.split(CURSOR_SEPARATOR)
+        if len(parts) != len(types):
+            raise ValueError(cursor)
+        return [type_(part) for type_, part in zip(types, parts)]
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise BadRequest('Некорректный курсор.')
+
+
+def encode_cursor(comment):
+    """Упаковываем позицию комментария (created, id) в строку для URL."""
+    return pack_cursor(comment.created.isoformat(), comment.pk)
+
+
+def decode_cursor(cursor):
+    """Распаковываем курсор обратно в пару (created, id)."""
+    return unpack_cursor(cursor, datetime.fromisoformat, int)
+
+
+def comments_queryset(news, cursor=None):
+    """
+    Запрос одной страницы комментариев новости (с запасом в один элемент).
+
+    Пагинация идёт по ключу (created, id), поэтому стоимость запроса
+    не зависит от того, насколько далеко пользователь пролистал ветку.
+    """
+    comments = (
+        Comment.objects
+        .filter(news=news)
+        .select_related('author')
+        .only(
+            'id', 'text', 'created', 'news_id',
+            'author__id', 'author__username',
+        )
+        .order_by('created', 'id')
+    )
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        comments = comments.filter(
+            Q(created__gt=created) | Q(created=created, id__gt=pk)
+        )
+    return comments[:settings.COMMENTS_COUNT_ON_DETAIL_PAGE + 1]
+
+
+def split_page(comments):
+    """Отрезаем лишний элемент и по нему понимаем, есть ли продолжение."""
+    page_size = settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+    if len(comments) <= page_size:
+        return comments, None
+    comments = comments[:page_size]
+    return comments, encode_cursor(comments[-1])
+
+
+def get_comments_page(news, cursor=None):
+    """Страница комментариев новости и курсор следующей страницы."""
+    return split_page(list(comments_queryset(news, cursor)))
+
+
+async def aget_comments_page(news, cursor=None):
+    """Асинхронный вариант get_comments_page."""
+    return split_page(
+        [comment async for comment in comments_queryset(news, cursor)]
+    )
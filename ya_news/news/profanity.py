@@ -0,0 +1,124 @@
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+
+# Латинские буквы и цифры, которыми обычно маскируют кириллицу.
+HOMOGLYPHS = str.maketrans({
+    'ё': 'е',
+    'a': 'а',
+    'b': 'в',
+    'c': 'с',
+    'e': 'е',
+    'h': 'н',
+    'k': 'к',
+    'm': 'м',
+    'o': 'о',
+    'p': 'р',
+    't': 'т',
+    'x': 'х',
+    'y': 'у',
+    '0': 'о',
+})
+
+
+def normalize(text):
+    """Приводим текст к нижнему регистру и единому алфавиту."""
+    return text.lower().translate(HOMOGLYPHS)
+
+
+class ProfanityMatcher:
+    """
+    Автомат Ахо — Корасик для поиска запрещённых слов за один проход.
+
+    Время проверки зависит только от длины текста,
+    а не от количества слов в словаре.
+    """
+
+    def __init__(self, words):
+        self._goto = [{}]
+        self._fail = [0]
+        self._terminal = [False]
+        for word in words:
+            self._add(normalize(word))
+        self._build_fail_links()
+
+    def _add(self, word):
+        if not word:
+            return
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append(False)
+            state = next_state
+        self._terminal[state] = True
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._terminal[self._fail[next_state]]:
+                    self._terminal[next_state] = True
+
+    def search(self, text):
+        """Есть ли в тексте хотя бы одно запрещённое слово."""
+        goto, fail, terminal = self._goto, self._fail, self._terminal
+        state = 0
+        for char in normalize(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
+
+
+def read_words(path):
+    """Читаем словарь: одно слово на строку, # — комментарий."""
+    with open(path, encoding='utf-8') as words_file:
+        for line in words_file:
+            word = line.split('#', 1)[0].strip()
+            if word:
+                yield word
+
+
+_lock = threading.Lock()
+_matcher = None
+_matcher_key = None
+
+
+def get_matcher(base_words=()):
+    """
+    Возвращаем автомат, собранный один раз на процесс.
+
+    Если в настройках указан BAD_WORDS_FILE, автомат пересобирается
+    при изменении файла — перезапуск сервера не нужен.
+    """
+    global _matcher, _matcher_key
+    path = getattr(settings, 'BAD_WORDS_FILE', None)
+    try:
+        mtime = os.stat(path).st_mtime_ns if path else None
+    except FileNotFoundError:
+        mtime = None
+    key = (tuple(base_words), path, mtime)
+    if key != _matcher_key:
+        with _lock:
+            if key != _matcher_key:
+                words = list(base_words)
+                if mtime is not None:
+                    words.extend(read_words(path))
+                _matcher = ProfanityMatcher(words)
+                _matcher_key = key
+    return _matcher
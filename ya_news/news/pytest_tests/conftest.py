@@ -3,14 +3,71 @@ from datetime import datetime, timedelta
 import pytest
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.urls import reverse
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
 from django.utils import timezone
 
+from news.buffer import CommentBuffer
 from news.models import Comment, News
+from .query_budget import check_query_budget, data_queries
 
 User = get_user_model()
 
 
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+@pytest.fixture(autouse=True, scope='session')
+def memory_caches():
+    """
+    Файловые кэши проекта общие с запущенным сервером: тесты
+    не должны ни сбрасывать их, ни писать в них. Заменяем их
+    кэшами в памяти.
+    """
+    override = override_settings(CACHES={
+        alias: {
+            **config,
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': f'test-{alias}',
+        } if config['BACKEND'] == FILE_CACHE else config
+        for alias, config in settings.CACHES.items()
+    })
+    override.enable()
+    yield
+    override.disable()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэш страниц не должен переживать тест."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Выполняет запрос к странице и проверяет её бюджет SQL-запросов.
+
+    Использование: query_budget(client.get, url) или
+    query_budget(client.post, url, data=..., budget=...).
+    """
+    def request(method, url, budget=None, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = method(url, **kwargs)
+        view_name = resolve(url.split('?')[0]).view_name
+        problems = check_query_budget(
+            view_name, data_queries(context.captured_queries), budget
+        )
+        if problems:
+            pytest.fail('\n'.join(problems), pytrace=False)
+        return response
+    return request
+
+
 @pytest.fixture
 def author(django_user_model):
     return django_user_model.objects.create(username='Комментатор')
@@ -120,3 +177,17 @@ def redirect_url_for_edit(edit_url, login_url):
 @pytest.fixture
 def redirect_url_for_delete(delete_url, login_url):
     return f'{login_url}?next={delete_url}'
+
+
+@pytest.fixture
+def comment_buffer(settings, monkeypatch):
+    """
+    Включённый буфер комментариев, который сам не сохраняется:
+    пачка велика, интервал долгий. В конце теста — остановка.
+    """
+    settings.NEWS_COMMENT_BUFFER = True
+    settings.NEWS_COMMENT_BUFFER_PUT_TIMEOUT = 0
+    buffer = CommentBuffer(size=2, batch_size=100, interval=60)
+    monkeypatch.setattr('news.buffer._buffer', buffer)
+    yield buffer
+    buffer.stop()
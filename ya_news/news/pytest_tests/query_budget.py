@@ -0,0 +1,79 @@
+"""
+Бюджет SQL-запросов на страницу и поиск кандидатов в N+1.
+
+Бюджет — максимум запросов на один запрос к странице. Сессия
+и пользователь после входа берутся из кэша и в бюджет не входят.
+Если страница стала дороже, это регрессия: либо исправьте код,
+либо осознанно поднимите бюджет здесь.
+"""
+import re
+from collections import Counter
+
+QUERY_BUDGETS = {
+    # +1 агрегирующий запрос для валидаторов ETag и Last-Modified.
+    'news:home': 2,
+    'news:detail': 3,
+    'news:comments': 2,
+    'news:search': 1,
+    'news:edit': 2,
+    'news:delete': 3,
+    # Не зависят от числа новостей и комментариев.
+    'admin:news_news_changelist': 3,
+    'admin:news_news_change': 4,
+    'admin:news_comment_changelist': 3,
+}
+# Одинаковый по форме запрос, повторённый столько раз, — кандидат в N+1.
+REPEATED_QUERY_THRESHOLD = 2
+
+TRANSACTION_STATEMENTS = re.compile(
+    r'^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b', re.IGNORECASE
+)
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+VALUES_LIST = re.compile(r'\((?:\s*\?\s*,)*\s*\?\s*\)')
+
+
+def normalize_sql(sql):
+    """Заменяем параметры на «?», оставляя только форму запроса."""
+    shape = STRING_LITERAL.sub('?', sql)
+    shape = NUMBER_LITERAL.sub('?', shape)
+    shape = VALUES_LIST.sub('(?)', shape)
+    return ' '.join(shape.split())
+
+
+def data_queries(captured_queries):
+    """SQL-запросы без служебных команд управления транзакциями."""
+    return [
+        query['sql'] for query in captured_queries
+        if not TRANSACTION_STATEMENTS.match(query['sql'])
+    ]
+
+
+def find_repeated_queries(queries, threshold=REPEATED_QUERY_THRESHOLD):
+    """Формы запросов, повторённые не меньше threshold раз."""
+    shapes = Counter(normalize_sql(sql) for sql in queries)
+    return {
+        shape: count for shape, count in shapes.items()
+        if count >= threshold
+    }
+
+
+def check_query_budget(view_name, queries, budget=None):
+    """
+    Проверяем число запросов и повторы; возвращаем список проблем.
+
+    Пустой список — страница уложилась в бюджет.
+    """
+    budget = QUERY_BUDGETS[view_name] if budget is None else budget
+    problems = []
+    if len(queries) > budget:
+        problems.append(
+            f'{view_name}: {len(queries)} запросов при бюджете {budget}'
+        )
+    for shape, count in find_repeated_queries(queries).items():
+        problems.append(f'{view_name}: возможен N+1 (x{count}): {shape}')
+    if problems:
+        problems.extend(f'  {number}. {sql}' for number, sql in enumerate(
+            queries, start=1
+        ))
+    return problems
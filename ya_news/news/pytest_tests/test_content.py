@@ -1,7 +1,20 @@
+from http import HTTPStatus
+from io import StringIO
+
 import pytest
 from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from django.utils.formats import localize_input
+
+from pytest_lazyfixture import lazy_fixture as lf
 
+from news.cache import HOME_PAGE_KEY, detail_page_key
 from news.forms import CommentForm
+from news.models import Comment, News
+from .query_budget import find_repeated_queries
 
 
 pytestmark = pytest.mark.django_db
@@ -28,6 +41,24 @@ def test_comments_order(client, detail_url, comments_batch):
     assert all_timestamps == sorted(all_timestamps)
 
 
+def test_comments_are_paginated_by_cursor(
+        client, settings, news, detail_url, comments_batch):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 4
+    response = client.get(detail_url)
+    first_page = response.context['comments']
+    assert len(first_page) == 4
+
+    seen = list(first_page)
+    cursor = response.context['next_cursor']
+    while cursor:
+        response = client.get(
+            reverse('news:comments', args=(news.id,)), {'after': cursor}
+        )
+        seen.extend(response.context['comments'])
+        cursor = response.context['next_cursor']
+    assert seen == list(news.comment_set.all())
+
+
 def test_anonymous_client_has_no_form(client, detail_url):
     response = client.get(detail_url)
     assert 'form' not in response.context
@@ -37,3 +68,177 @@ def test_authorized_client_has_form(author_client, detail_url):
     response = author_client.get(detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+def test_anonymous_page_is_cached_until_new_comment(
+        author_client, detail_url):
+    anonymous_client = Client()
+    first = anonymous_client.get(detail_url)
+    assert first['X-Page-Cache'] == 'MISS'
+    second = anonymous_client.get(detail_url)
+    assert second['X-Page-Cache'] == 'HIT'
+    assert second.content == first.content
+
+    author_client.post(detail_url, data={'text': 'Свежий комментарий'})
+    response = anonymous_client.get(detail_url)
+    assert response['X-Page-Cache'] == 'MISS'
+    assert 'Свежий комментарий' in response.content.decode()
+
+
+@pytest.mark.parametrize('url_fixture', (lf('home_url'), lf('detail_url')))
+def test_anonymous_conditional_get_gets_not_modified(url_fixture, news):
+    anonymous_client = Client()
+    first = anonymous_client.get(url_fixture)
+    assert first['ETag'] and first['Last-Modified']
+    for headers in (
+        {'HTTP_IF_NONE_MATCH': first['ETag']},
+        {'HTTP_IF_MODIFIED_SINCE': first['Last-Modified']},
+    ):
+        response = anonymous_client.get(url_fixture, **headers)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response['ETag'] == first['ETag']
+
+    # Без кэша страницы валидаторы считаются заново и совпадают.
+    cache.delete_many((HOME_PAGE_KEY, detail_page_key(news.pk)))
+    response = anonymous_client.get(
+        url_fixture, HTTP_IF_NONE_MATCH=first['ETag']
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_etag_changes_with_comment_edit_and_viewer(
+        author, reader, detail_url, comment, edit_url):
+    author_client, reader_client = Client(), Client()
+    author_client.force_login(author)
+    reader_client.force_login(reader)
+    author_etag = author_client.get(detail_url)['ETag']
+    assert reader_client.get(detail_url)['ETag'] != author_etag
+    assert 'private' in author_client.get(detail_url)['Cache-Control']
+
+    author_client.post(edit_url, data={'text': 'Исправленный текст'})
+    response = author_client.get(detail_url, HTTP_IF_NONE_MATCH=author_etag)
+    assert response.status_code == HTTPStatus.OK
+    assert 'Исправленный текст' in response.content.decode()
+
+
+def test_search_ranks_and_highlights(client, settings, news_batch):
+    settings.NEWS_SEARCH_RESULTS_PER_PAGE = 1
+    News.objects.create(title='Погода', text='Завтра <b>гроза</b> и гроза')
+    News.objects.create(title='Гроза', text='Гроза прошла, гроза ушла')
+    url = reverse('news:search')
+    response = client.get(url, {'q': 'гроза'})
+    first = response.context['results']
+    assert [result.title for result in first] == ['Гроза']
+
+    response = client.get(
+        url, {'q': 'гроза', 'after': response.context['next_cursor']}
+    )
+    (second,) = response.context['results']
+    assert second.title == 'Погода'
+    assert '<mark>гроза</mark>' in second.snippet
+    assert '&lt;b&gt;' in second.snippet
+    assert response.context['next_cursor'] is None
+
+
+def test_search_index_follows_updates_and_rebuild(client, news):
+    url = reverse('news:search')
+    News.objects.filter(pk=news.pk).update(title='Метеорит')
+    assert len(client.get(url, {'q': 'метеорит'}).context['results']) == 1
+    call_command('rebuild_news_search', chunk_size=1, stdout=StringIO())
+    assert len(client.get(url, {'q': 'метеорит'}).context['results']) == 1
+
+
+@pytest.mark.parametrize('client_fixture', (lf('client'), lf('author_client')))
+@pytest.mark.parametrize(
+    'url_fixture', (lf('home_url'), lf('detail_url'), lf('edit_url'))
+)
+def test_pages_fit_query_budget(
+        query_budget, client_fixture, url_fixture, news_batch,
+        comments_batch, comment):
+    query_budget(client_fixture.get, url_fixture)
+
+
+def test_repeated_query_shapes_are_reported():
+    queries = [
+        f'SELECT "auth_user"."id" FROM "auth_user" WHERE "id" = {pk}'
+        for pk in range(3)
+    ] + ["SELECT 1 FROM news_news WHERE title = 'x'"]
+    assert list(find_repeated_queries(queries).values()) == [3]
+
+
+@pytest.fixture
+def many_comments(news, author):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(45)
+    )
+    call_command('recount_comments', stdout=StringIO())
+
+
+def test_admin_news_change_shows_one_page_of_comments(
+        admin_client, query_budget, news, many_comments):
+    url = reverse('admin:news_news_change', args=(news.id,))
+    response = query_budget(admin_client.get, url)
+    formset = response.context['inline_admin_formsets'][0].formset
+    assert len(formset.forms) == settings.NEWS_ADMIN_COMMENTS_PER_PAGE
+    assert formset.forms[0].instance.text == 'Комментарий 44'
+    assert list(formset.page_links()) == [1, 2, 3]
+
+    response = query_budget(admin_client.get, f'{url}?comments_page=3')
+    formset = response.context['inline_admin_formsets'][0].formset
+    assert [form.instance.text for form in formset.forms] == [
+        f'Комментарий {index}' for index in range(4, -1, -1)
+    ]
+
+    response = admin_client.get(url, {'comments_page': '²'})
+    assert response.context['inline_admin_formsets'][0].formset.page == 1
+
+
+def test_admin_comment_page_saves_rows_shown(
+        admin_client, news, author, many_comments):
+    url = reverse('admin:news_news_change', args=(news.id,))
+    formset = admin_client.get(
+        url
+    ).context['inline_admin_formsets'][0].formset
+    shown = [form.instance.id for form in formset.forms]
+    news.refresh_from_db()
+    data = {
+        'title': news.title, 'text': news.text,
+        'date': localize_input(news.date), '_save': 'Сохранить',
+    }
+    for name, value in formset.management_form.initial.items():
+        data[f'{formset.prefix}-{name}'] = value
+    for index, comment_id in enumerate(shown):
+        prefix = f'{formset.prefix}-{index}'
+        data[f'{prefix}-id'] = comment_id
+        data[f'{prefix}-news'] = news.id
+        data[f'{prefix}-text'] = f'Правка {index}'
+    # Новый комментарий сдвигает смещение первой страницы.
+    Comment.objects.create(news=news, author=author, text='Новый')
+
+    response = admin_client.post(url, data)
+    assert response.status_code == HTTPStatus.FOUND
+    edited = dict(Comment.objects.filter(
+        id__in=shown
+    ).values_list('id', 'text'))
+    assert edited == {
+        comment_id: f'Правка {index}'
+        for index, comment_id in enumerate(shown)
+    }
+    assert Comment.objects.filter(text='Новый').exists()
+
+
+@pytest.mark.parametrize(
+    'url_name', ('admin:news_news_changelist', 'admin:news_comment_changelist')
+)
+def test_admin_changelists_fit_query_budget(
+        admin_client, query_budget, url_name, news_batch, many_comments):
+    query_budget(admin_client.get, reverse(url_name))
+
+
+def test_admin_news_search_uses_full_text_index(
+        admin_client, news_batch, news):
+    response = admin_client.get(
+        reverse('admin:news_news_changelist'), {'q': 'тестовая'}
+    )
+    assert list(response.context['cl'].result_list) == [news]
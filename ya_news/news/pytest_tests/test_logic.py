@@ -1,9 +1,23 @@
+import os
+import pickle
+import time
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.models import Comment, News
+from news.ratelimit import return_token, take_token
 
 
 COMMENT_DATA = {'text': 'Текст комментария'}
@@ -22,8 +36,10 @@ def test_anonym_cant_create_comment(client, detail_url):
 
 
 def test_user_can_create_comment(
-        author_client, detail_url, comments_url, news, author):
-    response = author_client.post(detail_url, data=COMMENT_DATA)
+        author_client, detail_url, comments_url, news, author, query_budget):
+    response = query_budget(
+        author_client.post, detail_url, data=COMMENT_DATA
+    )
     assert response.status_code == HTTPStatus.FOUND
     assert response.url == comments_url
 
@@ -43,6 +59,33 @@ def test_user_cant_use_bad_words(author_client, detail_url, bad_words_data):
     assert Comment.objects.count() == 0
 
 
+@pytest.mark.parametrize(
+    'masked_word',
+    # Латинские «p», «c», «a», заглавные буквы и «ё».
+    ('peдиcкa', 'РЕДИСКА', 'нёгодяй')
+)
+def test_bad_words_are_normalized(author_client, detail_url, masked_word):
+    response = author_client.post(
+        detail_url, data={'text': f'Вы {masked_word}!'}
+    )
+    assert response.context['form'].errors['text'] == [WARNING]
+    assert Comment.objects.count() == 0
+
+
+def test_bad_words_file_is_reloaded(
+        author_client, detail_url, settings, tmp_path):
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# словарь модерации\nбалбес\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    response = author_client.post(detail_url, data={'text': 'Ты балбес'})
+    assert response.context['form'].errors['text'] == [WARNING]
+
+    words_file.write_text('', encoding='utf-8')
+    os.utime(words_file, ns=(0, 0))
+    author_client.post(detail_url, data={'text': 'Ты балбес'})
+    assert Comment.objects.count() == 1
+
+
 def test_author_can_edit_comment(
         author_client, edit_url, comments_url, comment):
     response = author_client.post(edit_url, data=COMMENT_DATA)
@@ -55,6 +98,27 @@ def test_author_can_edit_comment(
     assert updated_comment.author == comment.author
 
 
+@pytest.mark.parametrize(
+    'text, expected_updates',
+    (
+        (COMMENT_DATA['text'], []),
+        ('Исправленный текст', ['"text"']),
+    ),
+)
+def test_comment_edit_writes_only_changed_columns(
+        author_client, edit_url, comment, text, expected_updates):
+    with CaptureQueriesContext(connection) as context:
+        author_client.post(edit_url, data={'text': text})
+    updates = [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('UPDATE "news_comment"')
+    ]
+    assert [
+        update.split(' SET ')[1].split(' = ')[0] for update in updates
+    ] == expected_updates
+    assert Comment.objects.get(id=comment.id).text == text
+
+
 def test_user_cant_edit_comment_of_another_user(
         reader_client, edit_url, comment):
     response = reader_client.post(edit_url, data=COMMENT_DATA)
@@ -86,3 +150,204 @@ def test_user_cant_delete_comment_of_another_user(
     assert unchanged_comment.text == comment.text
     assert unchanged_comment.news == comment.news
     assert unchanged_comment.author == comment.author
+
+
+def test_comment_count_follows_create_and_delete(
+        author_client, detail_url, delete_url, news, comment):
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+    author_client.post(detail_url, data=COMMENT_DATA)
+    news.refresh_from_db()
+    assert news.comment_count == 2
+
+    author_client.post(delete_url)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_moving_comment_moves_count_and_drops_pages(
+        admin_client, news, comment, detail_url):
+    other = News.objects.create(title='Другая', text='Текст')
+    anonymous_client = Client()
+    anonymous_client.get(detail_url)
+    assert anonymous_client.get(detail_url)['X-Page-Cache'] == 'HIT'
+
+    response = admin_client.post(
+        reverse('admin:news_comment_change', args=(comment.id,)),
+        {'news': other.id, 'author': comment.author_id, 'text': comment.text},
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    news.refresh_from_db()
+    other.refresh_from_db()
+    assert (news.comment_count, other.comment_count) == (0, 1)
+    assert anonymous_client.get(detail_url)['X-Page-Cache'] == 'MISS'
+
+
+def test_recount_comments_fixes_drift(news, comment):
+    News.objects.filter(pk=news.pk).update(comment_count=42)
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_seed_data_can_run_twice_with_same_seed(django_user_model):
+    for _ in range(2):
+        call_command(
+            'seed_data', users=3, news=2, comments=5, seed=0,
+            stdout=StringIO(),
+        )
+    assert django_user_model.objects.count() == 6
+    assert News.objects.count() == 4
+    assert Comment.objects.count() == 10
+
+
+def test_news_delete_skips_per_comment_receivers(news, author):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for index in range(20)
+    )
+    with CaptureQueriesContext(connection) as context:
+        news.delete()
+    assert not Comment.objects.exists()
+    updates = [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('UPDATE')
+    ]
+    assert updates == []
+
+
+def test_import_news_upserts_by_external_id(news, tmp_path):
+    News.objects.filter(pk=news.pk).update(
+        external_id='feed-1', date='2023-05-06'
+    )
+    source = tmp_path / 'feed.jsonl'
+    source.write_text(
+        '{"external_id": "feed-1", "title": "Обновлено", "text": "Т"}\n'
+        '{"external_id": "feed-2", "title": "Новая", "text": "Т",'
+        ' "date": "2024-01-02"}\n'
+        '{"title": "", "text": "без заголовка"}\n',
+        encoding='utf-8',
+    )
+    call_command(
+        'import_news', str(source), batch_size=2,
+        stdout=StringIO(), stderr=StringIO(),
+    )
+    assert News.objects.count() == 2
+    news.refresh_from_db()
+    assert news.title == 'Обновлено'
+    # Строка без даты не меняет дату новости.
+    assert news.date.isoformat() == '2023-05-06'
+    assert News.objects.get(external_id='feed-2').date.isoformat() == (
+        '2024-01-02'
+    )
+
+
+def test_comment_rate_limit_answers_429(
+        settings, author_client, reader, detail_url):
+    settings.NEWS_RATE_LIMITS = {
+        'news:detail': {'user': (2, 60), 'ip': (3, 60)},
+    }
+    for _ in range(2):
+        response = author_client.post(detail_url, data=COMMENT_DATA)
+        assert response.status_code == HTTPStatus.FOUND
+    response = author_client.post(detail_url, data=COMMENT_DATA)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert 0 < int(response['Retry-After']) <= 30
+    assert Comment.objects.count() == 2
+    # Чтение не ограничено.
+    assert author_client.get(detail_url).status_code == HTTPStatus.OK
+
+    # Отклонённый запрос не израсходовал токен IP, но их осталось
+    # на один запрос другого пользователя с того же адреса.
+    reader_client = Client()
+    reader_client.force_login(reader)
+    for status in (HTTPStatus.FOUND, HTTPStatus.TOO_MANY_REQUESTS):
+        response = reader_client.post(detail_url, data=COMMENT_DATA)
+        assert response.status_code == status
+
+
+def test_take_token_keeps_expiry_of_later_take():
+    cache = LocMemCache('ratelimit-race', {})
+    take = cache.incr
+
+    def racing_incr(key, delta):
+        # Между нашим incr и touch корзину увеличивает другой запрос.
+        full_at = take(key, delta)
+        cache.incr = take
+        take_token(cache, key, 1000, 60000)
+        return full_at
+
+    take_token(cache, 'bucket', 1000, 60000)
+    cache.incr = racing_incr
+    take_token(cache, 'bucket', 1000, 60000)
+    expires_at = cache._expire_info[cache.make_and_validate_key('bucket')]
+    assert expires_at > time.time() + 2.5
+
+
+def test_returned_token_keeps_bucket_expiry(tmp_path):
+    cache = FileBasedCache(str(tmp_path), {})
+    for _ in range(2):
+        take_token(cache, 'bucket', 1000, 60000)
+    return_token(cache, 'bucket', 1000)
+    # decr файлового кэша записал бы срок по умолчанию — 300 секунд.
+    path = cache._key_to_file('bucket')
+    with open(path, 'rb') as entry:
+        expires_at = pickle.load(entry)
+    assert expires_at < time.time() + 2
+
+
+def test_buffered_comments_are_written_in_batch(
+        author_client, reader, news, detail_url, comment_buffer):
+    author_client.post(detail_url, data=COMMENT_DATA)
+    reader_client = Client()
+    reader_client.force_login(reader)
+    reader_client.post(detail_url, data={'text': 'Второй комментарий'})
+    assert Comment.objects.count() == 0
+
+    # Автор видит свой комментарий: очередь сохраняется перед показом.
+    response = author_client.get(detail_url)
+    assert COMMENT_DATA['text'] in response.content.decode()
+    assert Comment.objects.count() == 2
+    news.refresh_from_db()
+    assert news.comment_count == 2
+
+
+def test_full_comment_buffer_writes_directly_and_flushes_on_stop(
+        author_client, news, detail_url, comment_buffer):
+    for index in range(3):
+        author_client.post(detail_url, data={'text': f'Текст {index}'})
+    # Третьему комментарию не хватило места в очереди.
+    assert list(Comment.objects.values_list('text', flat=True)) == [
+        'Текст 2'
+    ]
+    comment_buffer.stop()
+    assert Comment.objects.count() == 3
+    news.refresh_from_db()
+    assert news.comment_count == 3
+    # Остановленный буфер больше не принимает комментарии.
+    author_client.post(detail_url, data={'text': 'После остановки'})
+    assert Comment.objects.count() == 4
+
+
+def test_session_and_user_come_from_cache(author, edit_url):
+    client = Client()
+    client.force_login(author)
+    with CaptureQueriesContext(connection) as context:
+        client.get(edit_url)
+    tables = ' '.join(query['sql'] for query in context.captured_queries)
+    assert 'django_session' not in tables
+    assert 'auth_user' not in tables
+
+    # Потерянная в кэше сессия загружается из базы.
+    caches[settings.SESSION_CACHE_ALIAS].clear()
+    assert client.get(edit_url).status_code == HTTPStatus.OK
+
+
+def test_password_change_drops_cached_user(author, home_url):
+    client = Client()
+    client.force_login(author)
+    assert client.get(home_url).context['user'] == author
+    author.set_password('новый пароль')
+    author.save()
+    assert not client.get(home_url).context['user'].is_authenticated
@@ -0,0 +1,135 @@
+import re
+from dataclasses import dataclass
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .pagination import pack_cursor, unpack_cursor
+
+FTS_TABLE = 'news_news_fts'
+# Управляющие символы не встречаются в тексте новостей, поэтому ими
+# удобно размечать совпадения до экранирования HTML.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+SNIPPET_TOKENS = 24
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SEARCH_SQL = f'''
+    SELECT news.id, news.title, news.date,
+           snippet({FTS_TABLE}, -1, %s, %s, '…', {SNIPPET_TOKENS}),
+           bm25({FTS_TABLE}) AS score
+    FROM {FTS_TABLE}
+    JOIN news_news AS news ON news.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s {{after}}
+    ORDER BY score, news.id
+    LIMIT %s
+'''
+AFTER_SQL = (
+    f'AND (bm25({FTS_TABLE}) > %s '
+    f'OR (bm25({FTS_TABLE}) = %s AND news.id > %s))'
+)
+
+
+@dataclass
+class SearchResult:
+    pk: int
+    title: str
+    date: date
+    snippet: str
+    score: float
+
+
+def build_match_query(query):
+    """
+    Превращаем пользовательский ввод в безопасный запрос FTS5.
+
+    Каждое слово берём в кавычки, чтобы операторы FTS5 во вводе
+    не приводили к синтаксическим ошибкам. Слова объединяются по И.
+    """
+    return ' '.join(f'"{token}"' for token in TOKEN_RE.findall(query))
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_END, '</mark>')
+    )
+
+
+def search_news(query, cursor=None):
+    """
+    Ищем новости по заголовку и тексту, лучшие по BM25 — первыми.
+
+    Возвращаем страницу результатов и курсор следующей страницы.
+    """
+    match = build_match_query(query)
+    if not match:
+        return [], None
+    page_size = settings.NEWS_SEARCH_RESULTS_PER_PAGE
+    params = [MATCH_START, MATCH_END, match]
+    after = ''
+    if cursor:
+        score, pk = unpack_cursor(cursor, float, int)
+        after = AFTER_SQL
+        params += [score, score, pk]
+    params.append(page_size + 1)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(SEARCH_SQL.format(after=after), params)
+        rows = db_cursor.fetchall()
+    results = [
+        SearchResult(
+            pk=pk,
+            title=title,
+            date=date.fromisoformat(str(news_date)),
+            snippet=highlight(snippet),
+            score=score,
+        )
+        for pk, title, news_date, snippet, score in rows[:page_size]
+    ]
+    next_cursor = None
+    if len(rows) > page_size:
+        last = results[-1]
+        next_cursor = pack_cursor(repr(last.score), last.pk)
+    return results, next_cursor
+
+
+def rebuild_index(chunk_size=1000):
+    """
+    Заново индексируем все новости порциями по chunk_size строк.
+
+    Каждая порция пишется в своей транзакции, чтобы не держать
+    блокировку записи SQLite на всё время перестроения.
+    """
+    indexed = 0
+    last_id = 0
+    with transaction.atomic(), connection.cursor() as db_cursor:
+        db_cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')"
+        )
+    while True:
+        with transaction.atomic(), connection.cursor() as db_cursor:
+            db_cursor.execute(
+                f'''
+                INSERT INTO {FTS_TABLE}(rowid, title, text)
+                SELECT id, title, text FROM news_news
+                WHERE id > %s ORDER BY id LIMIT %s
+                ''',
+                [last_id, chunk_size],
+            )
+            if not db_cursor.rowcount:
+                return indexed
+            indexed += db_cursor.rowcount
+            db_cursor.execute(
+                '''
+                SELECT max(id) FROM (
+                    SELECT id FROM news_news
+                    WHERE id > %s ORDER BY id LIMIT %s
+                )
+                ''',
+                [last_id, chunk_size],
+            )
+            last_id = db_cursor.fetchone()[0]
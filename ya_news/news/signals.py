@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import cache_user, forget_user
+from .cache import invalidate_pages
+from .models import Comment, News
+
+
+def moved_from(instance, update_fields=None):
+    """
+    Новость, из которой комментарий перенесли этим сохранением, или None.
+
+    Прежнюю новость помнит ChangeTrackingMixin: значения, загруженные
+    из базы, он обновляет только после сигнала post_save.
+    """
+    if update_fields is not None and 'news' not in update_fields:
+        return None
+    loaded = getattr(instance, '_loaded_values', {}).get('news_id')
+    return loaded if loaded not in (None, instance.news_id) else None
+
+
+@receiver(post_save, sender=Comment)
+def increase_comment_count(sender, instance, created, raw=False,
+                           update_fields=None, **kwargs):
+    """
+    Увеличиваем счётчик комментариев новости при создании комментария.
+
+    При переносе в другую новость счётчик переходит вместе с ним.
+    """
+    if raw:
+        return
+    if created:
+        News.objects.filter(pk=instance.news_id).update(
+            comment_count=F('comment_count') + 1
+        )
+        return
+    old_news_id = moved_from(instance, update_fields)
+    if old_news_id is not None:
+        News.objects.filter(
+            pk=old_news_id, comment_count__gt=0
+        ).update(comment_count=F('comment_count') - 1)
+        News.objects.filter(pk=instance.news_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+def deleted_with_news(origin):
+    """
+    Удаление началось с новости, а комментарии удаляются каскадом.
+
+    Счётчик и кэш страниц такой новости обновлять незачем: её строка
+    удаляется, а страницы сбросит сигнал самой новости.
+    """
+    if isinstance(origin, QuerySet):
+        return origin.model is News
+    return isinstance(origin, News)
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comment_count(sender, instance, origin=None, **kwargs):
+    """Уменьшаем счётчик комментариев новости при удалении комментария."""
+    if deleted_with_news(origin):
+        return
+    News.objects.filter(
+        pk=instance.news_id, comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news_pages(sender, instance, **kwargs):
+    """Сбрасываем кэш страниц при изменении новости."""
+    invalidate_pages(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, created=False, **kwargs):
+    """
+    Сбрасываем кэш страницы новости при изменении комментария.
+
+    Главную сбрасываем, только если поменялось число комментариев;
+    у перенесённого комментария сбрасываем и страницу прежней новости.
+    """
+    if deleted_with_news(kwargs.get('origin')):
+        return
+    old_news_id = None
+    if kwargs['signal'] is post_save and not created:
+        old_news_id = moved_from(instance, kwargs.get('update_fields'))
+    if old_news_id is not None:
+        invalidate_pages(old_news_id, home=False)
+    home = (
+        created or old_news_id is not None
+        or kwargs['signal'] is post_delete
+    )
+    invalidate_pages(instance.news_id, home=home)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_changed_user(sender, instance, **kwargs):
+    """Убираем пользователя из кэша: изменились данные или пароль."""
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_in)
+def remember_logged_in_user(sender, request, user, **kwargs):
+    """Первый запрос после входа не идёт за пользователем в базу."""
+    cache_user(user)
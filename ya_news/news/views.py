@@ -1,50 +1,143 @@
+from datetime import datetime, time, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.db.models import Count, Max, Sum
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.urls import reverse
+from django.utils import timezone
 from django.views import generic
 
+from .buffer import get_comment_buffer, save_comment
+from .cache import (
+    AnonymousPageCacheMixin, HOME_PAGE_KEY, detail_page_key,
+    get_page_cache_stats
+)
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import aget_comments_page, get_comments_page
+from .ratelimit import RateLimitMixin
+from .search import search_news
+
+EPOCH = datetime.fromtimestamp(0, dt_timezone.utc)
+
 
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
 
-class NewsList(generic.ListView):
+
+class NewsList(AnonymousPageCacheMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
     context_object_name = 'news_feed'
 
+    def get_page_cache_key(self):
+        return HOME_PAGE_KEY
+
+    async def aget_page_state(self):
+        """Сводка по новостям главной одним запросом."""
+        state = await self.model.objects.filter(
+            pk__in=self.get_queryset().values('pk')
+        ).aaggregate(
+            count=Count('pk'),
+            last_pk=Max('pk'),
+            last_date=Max('date'),
+            comments=Sum('comment_count'),
+        )
+        last_date = state['last_date']
+        return state, start_of_day(last_date) if last_date else EPOCH
+
+    async def get_page(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        # async for заполняет кэш queryset: шаблон больше не ходит в БД.
+        [news async for news in self.object_list]
+        return self.render_to_response(self.get_context_data()).render()
+
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
 
-class NewsDetail(generic.DetailView):
+class NewsDetail(AnonymousPageCacheMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
+    def get_page_cache_key(self):
+        return detail_page_key(self.kwargs['pk'])
+
+    async def aget_page_state(self):
+        """Дата новости, счётчик и время последнего комментария."""
+        state = await self.model.objects.filter(
             pk=self.kwargs['pk']
+        ).values('pk', 'date', 'comment_count').annotate(
+            last_comment=Max('comment__created')
+        ).afirst()
+        if state is None:
+            return None, EPOCH
+        return state, max(
+            start_of_day(state['date']), state['last_comment'] or EPOCH
+        )
+
+    async def get_page(self, request, *args, **kwargs):
+        self.object = await aget_object_or_404(
+            self.model, pk=self.kwargs['pk']
+        )
+        self.comments, self.next_cursor = await aget_comments_page(
+            self.object
         )
-        return obj
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context).render()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context['comments'] = self.comments
+        context['next_cursor'] = self.next_cursor
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsCommentsPage(generic.DetailView):
+    """Следующая страница комментариев к новости (по курсору)."""
+    model = News
+    template_name = 'news/comments.html'
+
+    def get_object(self, queryset=None):
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'], context['next_cursor'] = get_comments_page(
+            self.object, self.request.GET.get('after')
+        )
+        return context
+
+
+class NewsSearch(generic.TemplateView):
+    """Полнотекстовый поиск по новостям."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        context['results'], context['next_cursor'] = search_news(
+            query, self.request.GET.get('after')
+        )
+        return context
+
+
 class NewsComment(
         LoginRequiredMixin,
+        RateLimitMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -56,27 +149,48 @@ class NewsComment(
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'], context['next_cursor'] = get_comments_page(
+            self.object
+        )
+        return context
+
     def form_valid(self, form):
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        save_comment(comment)
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
-
-    def get(self, request, *args, **kwargs):
+    """
+    Страница новости: чтение асинхронное, комментарий — синхронный.
+
+    Django требует, чтобы все обработчики представления были
+    одного типа, поэтому синхронный NewsComment обёрнут в sync_to_async.
+    Если комментарии автора ждут в буфере отложенной записи, перед
+    показом страницы буфер сохраняется.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        if settings.NEWS_COMMENT_BUFFER:
+            user = await request.auser()
+            buffer = get_comment_buffer()
+            if user.is_authenticated and buffer.has_pending(user.pk):
+                await sync_to_async(buffer.flush_for)(user.pk)
         view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        return await view(request, *args, **kwargs)
 
-    def post(self, request, *args, **kwargs):
-        view = NewsComment.as_view()
-        return view(request, *args, **kwargs)
+    async def post(self, request, *args, **kwargs):
+        view = sync_to_async(NewsComment.as_view())
+        return await view(request, *args, **kwargs)
 
 
 class CommentBase(LoginRequiredMixin):
@@ -84,9 +198,8 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
@@ -103,3 +216,9 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+@staff_member_required
+def page_cache_stats(request):
+    """Статистика кэша страниц для анонимных читателей."""
+    return JsonResponse(get_page_cache_stats())
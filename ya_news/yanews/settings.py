@@ -51,13 +51,100 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
+# Профиль SQLite для одновременных чтений и записей:
+# WAL не блокирует читателей во время записи, busy_timeout ждёт
+# освобождения блокировки вместо мгновенной ошибки «database is locked».
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA cache_size=-20000',
+    'PRAGMA mmap_size=134217728',
+    'PRAGMA temp_store=MEMORY',
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+            # Транзакция сразу берёт блокировку записи: без этого
+            # чтение с последующей записью ловит блокировку посреди
+            # транзакции, и busy_timeout уже не помогает.
+            # None вернёт стандартный режим DEFERRED.
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Кэш страниц сбрасывается сигналами в том процессе, где изменились
+# данные, поэтому он должен быть общим для всех процессов: LocMemCache
+# у каждого процесса свой, и остальные отдавали бы устаревшие страницы
+# до NEWS_PAGE_CACHE_TIMEOUT. Файловый кэш общий для процессов одной
+# машины; в продакшене на нескольких машинах — memcached или Redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'default',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'sessions',
+    },
+    'users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'news-users',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+
+# Сессии читаются из кэша, а пишутся и в кэш, и в базу: после
+# перезапуска или вытеснения из кэша сессия загрузится из базы.
+# Отдельный кэш не сбрасывается вместе с кэшем страниц. Кэш общий
+# для всех процессов, иначе выход из аккаунта удалял бы сессию только
+# из кэша одного воркера; в продакшене — memcached или Redis.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Пользователь запроса берётся из кэша процесса (см. news.backends).
+# ModelBackend оставлен для сессий, созданных до его появления.
+AUTHENTICATION_BACKENDS = [
+    'news.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+NEWS_USER_CACHE = 'users'
+NEWS_USER_CACHE_TIMEOUT = 30
+
+# Лимиты записей по имени URL (см. news.ratelimit): для пользователя
+# и для IP — (ёмкость корзины, секунд на её наполнение). IP общий
+# у всех за одним NAT, поэтому его лимит шире.
+NEWS_RATE_LIMITS = {
+    'news:detail': {'user': (10, 60), 'ip': (30, 60)},
+}
+# Корзинам нужен атомарный incr: в файловом кэше он читает и пишет
+# файл отдельно, и при одновременных запросах лимит приблизителен.
+# В продакшене — memcached или Redis.
+NEWS_RATE_LIMIT_CACHE = 'default'
+
+# Отложенная запись комментариев (см. news.buffer): очередь процесса
+# на NEWS_COMMENT_BUFFER_SIZE комментариев сохраняется пачками раз
+# в NEWS_COMMENT_BUFFER_INTERVAL секунд или по набору пачки. При полной
+# очереди запрос ждёт места NEWS_COMMENT_BUFFER_PUT_TIMEOUT секунд,
+# а затем пишет комментарий сам.
+NEWS_COMMENT_BUFFER = False
+NEWS_COMMENT_BUFFER_SIZE = 1000
+NEWS_COMMENT_BUFFER_BATCH_SIZE = 100
+NEWS_COMMENT_BUFFER_INTERVAL = 0.5
+NEWS_COMMENT_BUFFER_PUT_TIMEOUT = 1
+
+# Страницы для анонимов сбрасываются сигналами при изменении данных,
+# таймаут лишь ограничивает жизнь записи на крайний случай.
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 60
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +167,14 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 50
+
+NEWS_SEARCH_RESULTS_PER_PAGE = 20
+
+# Комментариев на странице встроенной таблицы в админке новости.
+NEWS_ADMIN_COMMENTS_PER_PAGE = 20
+
+# Файл со словарём запрещённых слов (одно слово на строку).
+# Дополняет news.forms.BAD_WORDS и перечитывается при изменении.
+BAD_WORDS_FILE = None
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.test.utils import override_settings
+
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+def use_memory_caches():
+    """
+    Файловые кэши проекта общие с работающим сервером: замер
+    не должен ни сбрасывать их, ни оставлять в них страницы своей
+    временной базы. Заменяем их кэшами в памяти процесса.
+    """
+    override_settings(CACHES={
+        alias: {
+            **config,
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': f'bench-{alias}',
+        } if config['BACKEND'] == FILE_CACHE else config
+        for alias, config in settings.CACHES.items()
+    }).enable()
@@ -0,0 +1,109 @@
+"""
+Размер базы и скорость работы с длинными текстами заметок.
+
+Одни и те же тексты, похожие на вставленные логи, записываются без
+сжатия (порог выше любой заметки) и со сжатием CompressedTextField.
+Печатаются размеры текстов в таблице заметок, несжатой копии
+в поисковом индексе и занятых страниц всей базы.
+Запуск из каталога ya_note:
+    python -m benchmarks.bench_compression --notes 500 --lines 200
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    override_settings, setup_test_environment
+)
+
+from notes.models import Note  # noqa: E402
+
+LOG_LINE = (
+    '2026-10-18 12:{minute:02}:{second:02} INFO worker-{worker} '
+    'обработан запрос #{number} за {ms} мс\n'
+)
+
+
+def make_text(index, lines):
+    return ''.join(
+        LOG_LINE.format(
+            minute=line % 60, second=(line * 7) % 60, worker=line % 4,
+            number=index * lines + line, ms=(line * 13) % 250,
+        )
+        for line in range(lines)
+    )
+
+
+def run(author, texts):
+    Note.all_objects.all().delete()
+    started = time.perf_counter()
+    for index, text in enumerate(texts):
+        Note.objects.create(
+            title=f'Лог {index}', text=text, slug=f'log-{index}',
+            author=author,
+        )
+    write = time.perf_counter() - started
+    started = time.perf_counter()
+    for note in Note.objects.all():
+        len(note.text)
+    read = time.perf_counter() - started
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT SUM(length(CAST(text AS BLOB))) FROM notes_note'
+        )
+        table = cursor.fetchone()[0]
+        # c1 — столбец text в таблице содержимого FTS5.
+        cursor.execute(
+            'SELECT SUM(length(CAST(c1 AS BLOB))) '
+            'FROM notes_note_fts_content'
+        )
+        index = cursor.fetchone()[0]
+        # Свободные страницы после удаления прошлого прогона не считаем.
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA freelist_count')
+        pages -= cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        database = pages * cursor.fetchone()[0]
+    return table, index, database, write, read
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=500)
+    parser.add_argument('--lines', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        author = get_user_model().objects.create(username='bench')
+        texts = [make_text(index, args.lines) for index in range(args.notes)]
+        print(f'{"":12} {"таблица":>10} {"индекс":>10} {"вся база":>10}')
+        for name, limit in (
+            ('без сжатия', float('inf')),
+            ('zlib', settings.NOTES_TEXT_COMPRESS_THRESHOLD),
+        ):
+            with override_settings(NOTES_TEXT_COMPRESS_THRESHOLD=limit):
+                table, index, database, write, read = run(author, texts)
+            print(
+                f'{name:12} {table / 1024:6.0f} КиБ {index / 1024:6.0f} КиБ '
+                f'{database / 1024:6.0f} КиБ  '
+                f'запись {write:6.2f} с  чтение {read:6.2f} с'
+            )
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Разбор Markdown против HTML из кэша для длинной заметки.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.bench_markdown --lines 2000 --repeat 50
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+django.setup()
+
+from notes.rendering import render, render_markdown  # noqa: E402
+
+SECTION = (
+    '## Раздел {index}\n\n'
+    'Обычный абзац с **жирным**, *курсивом* и [ссылкой](https://ya.ru).\n\n'
+    '- пункт списка\n- ещё пункт\n\n'
+    '```\nкод {index}\n```\n\n'
+)
+
+
+def timed(function, text, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function(text)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    text = ''.join(
+        SECTION.format(index=index) for index in range(args.lines // 10)
+    )
+    print(f'текст: {len(text.encode()) / 1024:.0f} КиБ')
+    print(f'разбор каждый раз {timed(render, text, args.repeat):8.2f} мс')
+    render_markdown(text)
+    print(
+        f'из кэша           '
+        f'{timed(render_markdown, text, args.repeat):8.2f} мс'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Объём истории заметок и время восстановления версии.
+
+Заметка правится много раз по одной строке; сравнивается объём,
+который заняли бы полные копии каждой версии, с объёмом цепочек
+разниц, и замеряется время восстановления самой старой версии.
+Запуск из каталога ya_note:
+    python -m benchmarks.bench_revisions --edits 200 --lines 300
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db.models import Sum  # noqa: E402
+from django.db.models.functions import Length  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from notes.models import Note, NoteRevision  # noqa: E402
+from notes.revisions import get_revision  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--edits', type=int, default=200)
+    parser.add_argument('--lines', type=int, default=300)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        author = get_user_model().objects.create(username='bench')
+        lines = [f'Пункт {index}: купить что-нибудь\n'
+                 for index in range(args.lines)]
+        note = Note.objects.create(
+            title='Список', text=''.join(lines), slug='list', author=author,
+        )
+        full_copies = 0
+        started = time.perf_counter()
+        for edit in range(args.edits):
+            lines[edit % args.lines] = f'Пункт {edit}: отмечено\n'
+            note.text = ''.join(lines)
+            note.save()
+            full_copies += len(note.text.encode())
+        write = time.perf_counter() - started
+
+        revisions = NoteRevision.objects.filter(note=note)
+        stored = revisions.aggregate(size=Sum(Length('data')))['size']
+        oldest = revisions.order_by('number').first().number
+        started = time.perf_counter()
+        get_revision(note, oldest)
+        read = time.perf_counter() - started
+        print(f'версий в базе: {revisions.count()} из {args.edits + 1}')
+        print(f'полные копии: {full_copies / 1024:8.0f} КиБ')
+        print(f'разницы:      {stored / 1024:8.0f} КиБ '
+              f'({stored / len(note.text.encode()):.1f} × живой текст)')
+        print(f'запись: {write / args.edits * 1000:.2f} мс на правку, '
+              f'восстановление: {read * 1000:.2f} мс')
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
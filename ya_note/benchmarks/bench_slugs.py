@@ -0,0 +1,72 @@
+"""
+Скорость создания заметок с похожими заголовками.
+
+Сравнивается подбор slug перебором («slug-2», «slug-3»… с запросом
+exists() на каждый вариант) и allocate_slug, которому хватает одного
+запроса по индексу. Запуск из каталога ya_note:
+    python -m benchmarks.bench_slugs --notes 1000 --titles 3
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from notes.models import Note  # noqa: E402
+from notes.slugs import transliterate  # noqa: E402
+
+
+def probing_slug(title):
+    """Прежний способ, дополненный перебором суффиксов."""
+    base = transliterate(title)
+    slug = base
+    number = 1
+    while Note.objects.filter(slug=slug).exists():
+        number += 1
+        slug = f'{base}-{number}'
+    return slug
+
+
+def create_notes(author, titles, count, choose_slug):
+    started = time.perf_counter()
+    for index in range(count):
+        title = titles[index % len(titles)]
+        Note.objects.create(
+            title=title, text='Текст', author=author,
+            slug=choose_slug(title),
+        )
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=1000)
+    parser.add_argument('--titles', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        author = get_user_model().objects.create(username='bench')
+        titles = [f'Список покупок {index}' for index in range(args.titles)]
+        for name, choose_slug in (
+            ('перебор exists()', probing_slug),
+            ('allocate_slug', lambda title: ''),
+        ):
+            Note.objects.all().delete()
+            rate = create_notes(author, titles, args.notes, choose_slug)
+            print(f'{name:18} {rate:8.0f} заметок/с')
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
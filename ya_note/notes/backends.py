@@ -0,0 +1,54 @@
+"""
+Аутентификация с кэшем пользователей в памяти процесса.
+
+AuthenticationMiddleware на каждом запросе загружает пользователя
+по id из сессии. CachedModelBackend берёт его из кэша NOTES_USER_CACHE
+(LocMemCache — свой у каждого процесса), где запись живёт
+NOTES_USER_CACHE_TIMEOUT секунд. Сохранение и удаление пользователя,
+в том числе смена пароля, сбрасывают запись сигналами в notes.signals;
+в других процессах старая запись доживает до таймаута. Права в кэш
+не попадают и по-прежнему читаются из базы.
+"""
+import copy
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+USER_CACHE_KEY = 'auth:user:{pk}'
+# Кэши прав ModelBackend на объекте пользователя — их не храним.
+PERMISSION_CACHES = ('_perm_cache', '_user_perm_cache', '_group_perm_cache')
+
+
+def user_cache():
+    return caches[settings.NOTES_USER_CACHE]
+
+
+def user_cache_key(user_id):
+    return USER_CACHE_KEY.format(pk=user_id)
+
+
+def cache_user(user):
+    user = copy.copy(user)
+    for name in PERMISSION_CACHES:
+        user.__dict__.pop(name, None)
+    user_cache().set(
+        user_cache_key(user.pk), user, settings.NOTES_USER_CACHE_TIMEOUT
+    )
+
+
+def forget_user(user_id):
+    user_cache().delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который ищет пользователя сначала в кэше."""
+
+    def get_user(self, user_id):
+        user = user_cache().get(user_cache_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache_user(user)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,64 @@
+"""
+Массовые операции над заметками автора.
+
+Выбранные заметки обрабатываются пачками по NOTES_BULK_BATCH_SIZE:
+на пачку — одна транзакция и по одному запросу на таблицу, а не
+запрос на каждую заметку. Короткие транзакции не держат блокировку
+записи SQLite подолгу. Сигналы save/delete при этом не вызываются,
+поэтому поиск и историю обновляем здесь же.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Note
+from .revisions import record_retitled_revisions
+from .search import retitle_indexed, unindex_notes
+
+
+def batches(ids):
+    size = settings.NOTES_BULK_BATCH_SIZE
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def bulk_delete(author, ids):
+    """Помечаем удалёнными заметки автора из ids; возвращаем их число."""
+    deleted = 0
+    for batch in batches(ids):
+        with transaction.atomic():
+            found = list(
+                Note.objects.filter(author=author, id__in=batch)
+                .values_list('id', flat=True)
+            )
+            if not found:
+                continue
+            now = timezone.now()
+            deleted += Note.objects.filter(id__in=found).update(
+                deleted_at=now, updated_at=now, slug=Note.tombstone_slug()
+            )
+            unindex_notes(found)
+    return deleted
+
+
+def bulk_retitle(author, ids, title):
+    """Даём заметкам автора из ids общий заголовок; возвращаем их число."""
+    retitled = 0
+    for batch in batches(ids):
+        with transaction.atomic():
+            notes = list(
+                Note.objects.filter(author=author, id__in=batch)
+                .exclude(title=title).only('id', 'title', 'text')
+            )
+            if not notes:
+                continue
+            found = [note.id for note in notes]
+            Note.objects.filter(id__in=found).update(
+                title=title, updated_at=timezone.now()
+            )
+            for note in notes:
+                note.title = title
+            retitle_indexed(found, title)
+            record_retitled_revisions(notes)
+            retitled += len(notes)
+    return retitled
@@ -0,0 +1,65 @@
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+
+class CompressedTextField(models.TextField):
+    """
+    Текст, который в базе хранится сжатым, если он длиннее порога.
+
+    Длинные значения сжимаются zlib и пишутся в столбец как BLOB,
+    короткие остаются обычным текстом. При чтении тип значения
+    подсказывает, нужно ли распаковывать, поэтому старые несжатые
+    строки читаются как есть. Порог задаётся в байтах UTF-8
+    настройкой NOTES_TEXT_COMPRESS_THRESHOLD.
+
+    Сжимается только сама таблица: поисковый индекс FTS5 хранит свою
+    несжатую копию текста (её читает snippet()). Индекс без копии
+    (content='', contentless_delete=1) требует SQLite 3.43 и сниппетов
+    на Python — пока копию принимаем сознательно.
+    """
+
+    def __init__(self, *args, compression_level=6, **kwargs):
+        self.compression_level = compression_level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.compression_level != 6:
+            kwargs['compression_level'] = self.compression_level
+        return name, path, args, kwargs
+
+    def compress(self, value, threshold=None):
+        """
+        Значение для записи в базу.
+
+        threshold заменяет порог из настроек: math.inf оставляет
+        любой текст несжатым.
+        """
+        if threshold is None:
+            threshold = settings.NOTES_TEXT_COMPRESS_THRESHOLD
+        encoded = value.encode()
+        if len(encoded) < threshold:
+            return value
+        compressed = zlib.compress(encoded, self.compression_level)
+        # Несжимаемые данные оставляем текстом: выигрыша нет.
+        return compressed if len(compressed) < len(encoded) else value
+
+    @staticmethod
+    def decompress(value):
+        if isinstance(value, (bytes, memoryview)):
+            return zlib.decompress(value).decode()
+        return value
+
+    def from_db_value(self, value, expression, connection):
+        return self.decompress(value)
+
+    def to_python(self, value):
+        return super().to_python(self.decompress(value))
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if isinstance(value, str):
+            return self.compress(value)
+        return value
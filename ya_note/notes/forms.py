@@ -1,5 +1,3 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
 
@@ -16,14 +14,71 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
+        """
+        Обрабатывает случай, если slug не уникален.
+
+        Пустой slug подбирается по заголовку при сохранении заметки,
+        занятый slug, указанный вручную, — ошибка пользователя.
+        Неизменённый slug заметки в базе не проверяем.
+        """
+        slug = self.cleaned_data.get('slug')
+        if slug and slug != self.instance.slug and Note.all_objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+    def validate_unique(self):
+        """Уникальность slug уже проверена в clean_slug."""
+
+    def add_slug_taken_error(self):
+        """slug, свободный при проверке, заняли до сохранения."""
+        self.add_error('slug', self.cleaned_data['slug'] + WARNING)
+
+
+class NoteImportForm(forms.Form):
+    """Файл с заметками: JSONL или zip-архив Markdown."""
+    file = forms.FileField(
+        label='Файл',
+        help_text=('JSONL с полями title, text и slug или zip-архив '
+                   'файлов .md, где первая строка «# Заголовок»')
+    )
+
+
+class NoteIdsField(forms.Field):
+    """Список id заметок из нескольких значений одного параметра."""
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        try:
+            return sorted({int(note_id) for note_id in value or ()})
+        except (TypeError, ValueError):
+            raise ValidationError('Некорректный список заметок.')
+
+
+class NoteBulkForm(forms.Form):
+    """Действие над несколькими заметками из списка."""
+    DELETE = 'delete'
+    RETITLE = 'retitle'
+
+    ids = NoteIdsField(
+        error_messages={'required': 'Выберите хотя бы одну заметку.'}
+    )
+    action = forms.ChoiceField(
+        label='Действие',
+        choices=((DELETE, 'Удалить'), (RETITLE, 'Сменить заголовок')),
+    )
+    title = forms.CharField(
+        label='Новый заголовок',
+        max_length=Note._meta.get_field('title').max_length,
+        required=False,
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if (
+            cleaned_data.get('action') == self.RETITLE
+            and not cleaned_data.get('title')
+        ):
+            self.add_error('title', 'Укажите новый заголовок.')
+        return cleaned_data
@@ -0,0 +1,71 @@
+import math
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Value
+
+from notes.models import Note
+
+# typeof() отличает уже сжатые значения (blob) от обычного текста.
+PENDING_SQL = {
+    'compress': (
+        "SELECT id FROM notes_note WHERE typeof(text) = 'text' "
+        'AND length(CAST(text AS BLOB)) >= %(threshold)s '
+        'AND id > %(last_id)s ORDER BY id LIMIT %(limit)s'
+    ),
+    'decompress': (
+        "SELECT id FROM notes_note WHERE typeof(text) = 'blob' "
+        'AND id > %(last_id)s ORDER BY id LIMIT %(limit)s'
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Порциями сжимает тексты заметок, записанные до появления '
+        'сжатия. С --decompress возвращает их в обычный текст.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--decompress', action='store_true')
+
+    def handle(self, *args, **options):
+        mode = 'decompress' if options['decompress'] else 'compress'
+        threshold = settings.NOTES_TEXT_COMPRESS_THRESHOLD
+        # Порог выше любого значения оставляет текст как есть.
+        write_threshold = math.inf if mode == 'decompress' else threshold
+        field = Note._meta.get_field('text')
+        processed = 0
+        last_id = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(PENDING_SQL[mode], {
+                    'threshold': threshold,
+                    'last_id': last_id,
+                    'limit': options['chunk_size'],
+                })
+                ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                break
+            with transaction.atomic():
+                notes = list(
+                    Note.all_objects.filter(id__in=ids).only('id', 'text')
+                )
+                # Готовое значение в Value bulk_update пишет как есть,
+                # минуя сжатие поля с порогом из настроек.
+                for note in notes:
+                    note.text = Value(
+                        field.compress(note.text, write_threshold)
+                    )
+                # bulk_update не трогает updated_at: для клиентов
+                # синхронизации содержимое заметок не изменилось.
+                Note.all_objects.bulk_update(notes, ('text',))
+            processed += len(ids)
+            last_id = ids[-1]
+            if options['verbosity'] > 1:
+                self.stdout.write(f'… {processed}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано заметок: {processed}')
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from notes.search import reindex
+
+
+class Command(BaseCommand):
+    help = (
+        'Догоняет поисковый индекс заметок: добавляет непроиндексированные '
+        'и удаляет записи об удалённых. --full перестраивает индекс целиком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true')
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='заметок в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        indexed, removed = reindex(options['full'], options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано: {indexed}, удалено из индекса: {removed}'
+        ))
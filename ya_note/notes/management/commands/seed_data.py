@@ -0,0 +1,112 @@
+import random
+import uuid
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from pytils.translit import slugify
+
+from notes.models import Note
+
+WORDS = (
+    'купить', 'молоко', 'хлеб', 'позвонить', 'маме', 'встреча', 'проект',
+    'отчёт', 'идея', 'книга', 'прочитать', 'фильм', 'посмотреть', 'спорт',
+    'тренировка', 'врач', 'записаться', 'отпуск', 'билеты', 'подарок',
+    'день', 'рождения', 'список', 'дел', 'работа', 'дом', 'ремонт',
+    'важно', 'срочно', 'завтра', 'потом', 'напомнить', 'план', 'неделя',
+)
+
+
+def sentence(rng, min_words, max_words):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize()
+
+
+def note_text(rng):
+    """Большинство заметок короткие, но встречаются и очень длинные."""
+    target = max(10, int(rng.paretovariate(1.5) * 80))
+    lines = []
+    length = 0
+    while length < target:
+        lines.append(sentence(rng, 3, 12) + '.')
+        length += len(lines[-1]) + 1
+    return '\n'.join(lines)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями и заметками '
+        'для нагрузочных замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--notes', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Префикс имён и slug свой у каждого запуска: повторный запуск
+        # с тем же --seed не должен занять те же имена.
+        prefix = f'seed-{uuid.uuid4().hex[:6]}'
+        users = self.create_users(
+            prefix, options['users'], options['batch_size']
+        )
+        created = self.create_notes(
+            rng, prefix, users, options['notes'], options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(users)}, заметок {created}'
+        ))
+
+    def create_users(self, prefix, count, batch_size):
+        User = get_user_model()
+        password = make_password(None)
+        for batch in batched(range(count), batch_size):
+            User.objects.bulk_create(
+                User(username=f'{prefix}-{index}', password=password)
+                for index in batch
+            )
+        return list(
+            User.objects.filter(username__startswith=prefix)
+            .values_list('pk', flat=True)
+        )
+
+    def create_notes(self, rng, prefix, users, count, batch_size):
+        """
+        Распределяем заметки по закону Ципфа.
+
+        У немногих активных пользователей тысячи заметок,
+        у остальных — единицы.
+        """
+        if not users:
+            return 0
+        weights = [1 / rank for rank in range(1, len(users) + 1)]
+        max_slug_length = Note._meta.get_field('slug').max_length
+        for batch in batched(range(count), batch_size):
+            authors = rng.choices(users, weights=weights, k=len(batch))
+            notes = []
+            for index, author_id in zip(batch, authors):
+                title = sentence(rng, 1, 6)[:100]
+                suffix = f'-{prefix}-{index}'
+                notes.append(Note(
+                    title=title,
+                    text=note_text(rng),
+                    slug=(
+                        slugify(title)[:max_slug_length - len(suffix)]
+                        + suffix
+                    ),
+                    author_id=author_id,
+                ))
+            with transaction.atomic():
+                Note.objects.bulk_create(notes)
+        return count
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+CREATE_SQL = (
+    '''
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    '''
+    INSERT INTO notes_note_fts(rowid, title, text)
+    SELECT id, title, text FROM notes_note
+    ''',
+)
+DROP_SQL = ('DROP TABLE IF EXISTS notes_note_fts',)
+
+
+def run_on_sqlite(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:11
+
+import notes.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_sync_fields'),
+    ]
+
+    operations = [
+        # Столбец остаётся прежним: сжатые значения SQLite хранит
+        # в нём как BLOB, поэтому пересоздавать таблицу не нужно.
+        # Существующие строки сжимает команда compress_notes.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='note',
+                    name='text',
+                    field=notes.fields.CompressedTextField(help_text='Добавьте подробностей', verbose_name='Текст'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:14
+
+import hashlib
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+CHUNK_SIZE = 500
+
+
+# Копии notes.revisions.content_digest и encode_snapshot на момент
+# миграции: миграция не должна зависеть от кода приложения.
+def content_digest(title, text):
+    return hashlib.sha1(f'{title}\0{text}'.encode()).hexdigest()
+
+
+def encode_snapshot(text):
+    return zlib.compress(text.encode())
+
+
+def snapshot_existing_notes(apps, schema_editor):
+    """
+    Первая версия существующих заметок — снимок текущего текста.
+
+    Исторический CompressedTextField уже распаковывает text при чтении.
+    """
+    Note = apps.get_model('notes', 'Note')
+    NoteRevision = apps.get_model('notes', 'NoteRevision')
+    notes = Note._default_manager.filter(deleted_at__isnull=True).only(
+        'id', 'title', 'text'
+    ).order_by('id')
+    last_id = 0
+    while True:
+        chunk = list(notes.filter(id__gt=last_id)[:CHUNK_SIZE])
+        if not chunk:
+            break
+        NoteRevision._default_manager.bulk_create(
+            NoteRevision(
+                note=note, number=1, title=note.title, is_snapshot=True,
+                digest=content_digest(note.title, note.text),
+                data=encode_snapshot(note.text),
+            )
+            for note in chunk
+        )
+        last_id = chunk[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_note_text_compressed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('title', models.CharField(max_length=100, verbose_name='Заголовок')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='Снимок')),
+                ('digest', models.CharField(editable=False, max_length=40)),
+                ('data', models.BinaryField()),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='notes.note')),
+            ],
+            options={
+                'ordering': ('-number',),
+                'constraints': [models.UniqueConstraint(fields=('note', 'number'), name='note_revision_number_uniq')],
+            },
+        ),
+        migrations.RunPython(
+            snapshot_existing_notes, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+from django.db.models.functions import Cast, Concat, Left
+
+# Копия правил Note.soft_delete на момент миграции: миграция
+# не должна зависеть от кода приложения.
+TOMBSTONE_MARK = '@deleted-'
+TOMBSTONE_BASE_LENGTH = 100 - len(TOMBSTONE_MARK) - 19
+
+
+def free_tombstone_slugs(apps, schema_editor):
+    """Надгробия, удалённые раньше, отдают свои slug."""
+    Note = apps.get_model('notes', 'Note')
+    Note._default_manager.filter(deleted_at__isnull=False).exclude(
+        slug__contains=TOMBSTONE_MARK
+    ).update(slug=Concat(
+        Left('slug', TOMBSTONE_BASE_LENGTH),
+        models.Value(TOMBSTONE_MARK),
+        Cast('id', models.CharField()),
+        output_field=models.CharField(),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_note_revision'),
+    ]
+
+    operations = [
+        migrations.RunPython(free_tombstone_slugs, migrations.RunPython.noop),
+    ]
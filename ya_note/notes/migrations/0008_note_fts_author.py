@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# Копия правил notes.search на момент миграции: миграция не должна
+# зависеть от кода приложения.
+FTS_TABLE = 'notes_note_fts'
+CHUNK_SIZE = 500
+TOKENIZE = "tokenize='unicode61 remove_diacritics 2'"
+
+
+def author_token(author_id):
+    return f'a{author_id}'
+
+
+def rebuild_index(with_author):
+    """
+    Пересоздаём индекс и заполняем его живыми заметками.
+
+    Текст читаем через историческую модель: в таблице он может
+    лежать сжатым, а индексу нужен исходный.
+    """
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        columns = 'title, text, author' if with_author else 'title, text'
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+            f'{columns}, {TOKENIZE})'
+        )
+        Note = apps.get_model('notes', 'Note')
+        notes = Note._default_manager.filter(
+            deleted_at__isnull=True
+        ).only('id', 'title', 'text', 'author_id').order_by('id')
+        last_id = 0
+        while chunk := list(notes.filter(id__gt=last_id)[:CHUNK_SIZE]):
+            rows = []
+            for note in chunk:
+                row = [note.id, note.title, note.text]
+                if with_author:
+                    row.append(author_token(note.author_id))
+                rows.append(row)
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE}(rowid, {columns}) '
+                    f'VALUES ({", ".join(["%s"] * len(rows[0]))})',
+                    rows,
+                )
+            last_id = chunk[-1].id
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0007_free_tombstone_slugs'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_index(True), rebuild_index(False)),
+    ]
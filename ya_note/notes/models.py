@@ -1,17 +1,92 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Cast, Concat, Left
+from django.utils import timezone
 
-from pytils.translit import slugify
+from .fields import CompressedTextField
+from .slugs import allocate_slug
 
+SLUG_ATTEMPTS = 5
+# Надгробие освобождает slug: он становится «slug@deleted-<id>».
+# «@» нет в алфавите SlugField, так что с slug пользователя такой
+# не совпадёт, а id делает его уникальным.
+TOMBSTONE_MARK = '@deleted-'
+# Столько цифр в id BigAutoField.
+ID_DIGITS = 19
 
-class Note(models.Model):
+
+class ChangeTrackingMixin:
+    """
+    Запоминаем значения полей, загруженные из базы.
+
+    save() загруженного объекта пишет только изменённые поля
+    (и поля с auto_now), а если ничего не изменилось — не обращается
+    к базе вовсе. Явно переданный update_fields не трогаем.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_changed_fields(self):
+        """Имена полей, изменённых с момента загрузки или сохранения."""
+        deferred = self.get_deferred_fields()
+        changed = set()
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname in deferred:
+                continue
+            # Поле, догруженное после отложенной загрузки, не сравнить
+            # с исходным значением — считаем его изменённым.
+            if (
+                field.attname not in self._loaded_values
+                or getattr(self, field.attname)
+                != self._loaded_values[field.attname]
+            ):
+                changed.add(field.name)
+        return changed
+
+    def save(self, *args, **kwargs):
+        tracked = (
+            not args
+            and not self._state.adding
+            and not kwargs.get('force_insert')
+            and 'update_fields' not in kwargs
+            and hasattr(self, '_loaded_values')
+        )
+        if tracked:
+            changed = self.get_changed_fields()
+            if not changed:
+                return
+            kwargs['update_fields'] = changed | {
+                field.name for field in self._meta.concrete_fields
+                if getattr(field, 'auto_now', False)
+            }
+        super().save(*args, **kwargs)
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
+
+
+class LiveNoteManager(models.Manager):
+    """Заметки без удалённых (надгробий)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class Note(ChangeTrackingMixin, models.Model):
     title = models.CharField(
         'Заголовок',
         max_length=100,
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
@@ -27,12 +102,106 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField('Изменена', auto_now=True)
+    deleted_at = models.DateTimeField(
+        'Удалена', null=True, blank=True, editable=False
+    )
+
+    objects = LiveNoteManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        # Уникальность slug и синхронизация должны видеть и надгробия.
+        default_manager_name = 'all_objects'
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+            models.Index(
+                fields=('author', 'updated_at', 'id'),
+                name='note_author_updated_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    def soft_delete(self):
+        """
+        Помечаем заметку удалённой, оставляя надгробие.
+
+        По надгробию клиенты синхронизации узнают об удалении,
+        а slug освобождается для новых заметок.
+        """
+        self.deleted_at = timezone.now()
+        self.slug = (
+            f'{self.slug[:self.tombstone_base_length()]}'
+            f'{TOMBSTONE_MARK}{self.pk}'
+        )
+        self.save(update_fields=('deleted_at', 'updated_at', 'slug'))
+
+    @classmethod
+    def tombstone_base_length(cls):
+        return (
+            cls._meta.get_field('slug').max_length
+            - len(TOMBSTONE_MARK) - ID_DIGITS
+        )
+
+    @classmethod
+    def tombstone_slug(cls):
+        """Выражение slug надгробия — для массового удаления."""
+        return Concat(
+            Left('slug', cls.tombstone_base_length()),
+            models.Value(TOMBSTONE_MARK),
+            Cast('id', models.CharField()),
+            output_field=models.CharField(),
+        )
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Пустой slug подбираем по заголовку.
+
+        Если параллельный запрос успел занять тот же slug,
+        подбираем новый и повторяем сохранение.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        others = type(self)._default_manager.exclude(pk=self.pk)
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            self.slug = allocate_slug(others, self.title, max_slug_length)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                self.slug = ''
+                if attempt == SLUG_ATTEMPTS:
+                    raise
+
+
+class NoteRevision(models.Model):
+    """
+    Версия заметки: снимок целиком или разница с предыдущей версией.
+
+    Кодирование и восстановление — в модуле notes.revisions.
+    """
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+    )
+    number = models.PositiveIntegerField('Номер')
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    title = models.CharField('Заголовок', max_length=100)
+    is_snapshot = models.BooleanField('Снимок', default=False)
+    digest = models.CharField(max_length=40, editable=False)
+    data = models.BinaryField(editable=False)
+
+    class Meta:
+        ordering = ('-number',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'number'), name='note_revision_number_uniq'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.note_id} v{self.number}'
@@ -0,0 +1,128 @@
+"""
+Ограничение частоты записей: корзина токенов на пользователя и на IP.
+
+Лимиты задаются в NOTES_RATE_LIMITS по имени URL: для каждой области
+('user', 'ip') — ёмкость корзины и период в секундах, за который
+пустая корзина наполняется целиком. Корзина хранится в кэше одним
+числом: моментом в миллисекундах, когда она снова станет полной.
+Запрос берёт токен атомарным incr на интервал между токенами;
+если этот момент ушёл дальше периода от текущего, токенов нет:
+взятое возвращаем decr, а клиент получает 429. Запись живёт, пока
+корзина не полна, поэтому отсутствие ключа и есть полная корзина.
+Проверка обходится несколькими операциями с кэшем, без базы.
+
+IP берётся из REMOTE_ADDR: за обратным прокси его нужно передавать
+туда самим прокси.
+"""
+import math
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+RATE_LIMIT_KEY = 'ratelimit:{view}:{scope}:{ident}'
+RATE_LIMITED_MESSAGE = 'Слишком много запросов. Повторите попытку позже.'
+
+
+def extend_bucket(cache, key, full_at, now):
+    """
+    Продлеваем запись корзины до момента full_at.
+
+    Параллельный запрос мог уже увеличить корзину и продлить запись
+    дальше: touch с нашим full_at укоротил бы её, и корзина
+    наполнилась бы раньше срока. Поэтому продлеваем, только если
+    в кэше всё ещё наше значение; иначе продлит тот, кто его изменил.
+    """
+    if cache.get(key, full_at) <= full_at:
+        cache.touch(key, (full_at - now) / 1000)
+
+
+def return_token(cache, key, interval):
+    """
+    Возвращаем взятый токен.
+
+    decr файлового кэша переписывает запись со сроком по умолчанию,
+    поэтому срок выставляем заново, как при продлении. Если записи
+    уже нет, корзина полна и возвращать нечего.
+    """
+    now = int(time.time() * 1000)
+    try:
+        full_at = cache.decr(key, interval)
+    except ValueError:
+        return
+    extend_bucket(cache, key, full_at, now)
+
+
+def take_token(cache, key, interval, period_ms):
+    """
+    Берём токен из корзины.
+
+    Возвращаем 0, если токен был, иначе — через сколько секунд
+    он появится.
+    """
+    now = int(time.time() * 1000)
+    try:
+        full_at = cache.incr(key, interval)
+    except ValueError:
+        full_at = now + interval
+        if not cache.add(key, full_at, timeout=interval / 1000):
+            full_at = cache.incr(key, interval)
+    if full_at - now > period_ms:
+        return_token(cache, key, interval)
+        return math.ceil((full_at - now - period_ms) / 1000)
+    extend_bucket(cache, key, full_at, now)
+    return 0
+
+
+def check_rate_limit(request):
+    """
+    Берём по токену из корзин пользователя и IP по лимитам URL запроса.
+
+    Возвращаем 0 или наибольшее время ожидания в секундах. Отклонённый
+    запрос не расходует токены: взятые из других корзин возвращаем.
+    """
+    cache = caches[settings.NOTES_RATE_LIMIT_CACHE]
+    view = request.resolver_match.view_name
+    idents = {
+        'user': request.user.pk if request.user.is_authenticated else None,
+        'ip': request.META.get('REMOTE_ADDR'),
+    }
+    taken = []
+    retry_after = 0
+    for scope, (capacity, period) in settings.NOTES_RATE_LIMITS.get(
+        view, {}
+    ).items():
+        ident = idents[scope]
+        if ident is None:
+            continue
+        key = RATE_LIMIT_KEY.format(view=view, scope=scope, ident=ident)
+        period_ms = period * 1000
+        interval = max(1, period_ms // capacity)
+        wait = take_token(cache, key, interval, period_ms)
+        if wait:
+            retry_after = max(retry_after, wait)
+        else:
+            taken.append((key, interval))
+    if retry_after:
+        for key, interval in taken:
+            return_token(cache, key, interval)
+    return retry_after
+
+
+class RateLimitMixin:
+    """Отвечает 429 на запросы сверх лимитов NOTES_RATE_LIMITS."""
+    rate_limited_methods = ('POST',)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in self.rate_limited_methods:
+            retry_after = check_rate_limit(request)
+            if retry_after:
+                return HttpResponse(
+                    RATE_LIMITED_MESSAGE,
+                    content_type='text/plain; charset=utf-8',
+                    status=HTTPStatus.TOO_MANY_REQUESTS,
+                    headers={'Retry-After': str(retry_after)},
+                )
+        return super().dispatch(request, *args, **kwargs)
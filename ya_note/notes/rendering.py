@@ -0,0 +1,92 @@
+"""
+Текст заметки в HTML по разметке Markdown.
+
+Готовый HTML кладётся в кэш NOTES_MARKDOWN_CACHE под ключом
+из хэша текста: разбор выполняется при первом просмотре, а после
+правки текста ключ меняется сам, и старая запись вытесняется
+ограничением MAX_ENTRIES кэша. Сырой HTML в заметках не
+пропускается, ссылки с опасными схемами удаляются.
+"""
+import hashlib
+import html
+import re
+import threading
+from urllib.parse import urlsplit
+
+import markdown
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.safestring import mark_safe
+from markdown.treeprocessors import Treeprocessor
+
+# Меняется вместе с настройками разбора — старые записи кэша
+# перестают находиться.
+RENDER_VERSION = 1
+CACHE_KEY = 'notes:markdown:{version}:{digest}'
+EXTENSIONS = ('fenced_code', 'tables', 'sane_lists')
+SAFE_SCHEMES = {'', 'http', 'https', 'mailto'}
+URL_ATTRIBUTES = ('href', 'src')
+# Браузер выбрасывает их из адреса, поэтому «java\tscript:» — тоже схема.
+IGNORED_URL_CHARS = re.compile(r'[\x00-\x20]')
+
+
+class UnsafeUrlRemover(Treeprocessor):
+    """
+    Убираем ссылки и картинки со схемами вроде javascript:.
+
+    Сущности в атрибутах Markdown оставляет как есть, а браузер
+    раскроет, поэтому схему проверяем после их раскрытия.
+    """
+
+    def run(self, root):
+        for element in root.iter():
+            for attribute in URL_ATTRIBUTES:
+                url = element.get(attribute)
+                if url is None:
+                    continue
+                url = IGNORED_URL_CHARS.sub('', html.unescape(url))
+                try:
+                    scheme = urlsplit(url).scheme.lower()
+                except ValueError:
+                    scheme = None
+                if scheme not in SAFE_SCHEMES:
+                    del element.attrib[attribute]
+
+
+def build_renderer():
+    renderer = markdown.Markdown(extensions=EXTENSIONS)
+    # Сырой HTML из текста выводим как текст, а не как разметку.
+    renderer.preprocessors.deregister('html_block')
+    renderer.inlinePatterns.deregister('html')
+    renderer.treeprocessors.register(
+        UnsafeUrlRemover(renderer), 'unsafe_url_remover', -1
+    )
+    return renderer
+
+
+# Экземпляр Markdown хранит состояние разбора, поэтому у каждого
+# потока свой.
+local = threading.local()
+
+
+def render(text):
+    renderer = getattr(local, 'renderer', None)
+    if renderer is None:
+        renderer = local.renderer = build_renderer()
+    return renderer.reset().convert(text)
+
+
+def cache_key(text):
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    return CACHE_KEY.format(version=RENDER_VERSION, digest=digest)
+
+
+def render_markdown(text):
+    """HTML заметки: из кэша или, при первом просмотре, разбором."""
+    cache = caches[settings.NOTES_MARKDOWN_CACHE]
+    key = cache_key(text)
+    html = cache.get(key)
+    if html is None:
+        html = render(text)
+        cache.set(key, html, settings.NOTES_MARKDOWN_CACHE_TIMEOUT)
+    return mark_safe(html)
@@ -0,0 +1,203 @@
+"""
+История заметок в виде цепочек разниц.
+
+Каждая версия — либо снимок текста целиком, либо разница с предыдущей
+версией (по строкам, см. encode_delta). Снимок пишется каждые
+NOTES_REVISION_SNAPSHOT_EVERY версий, поэтому для восстановления любой
+версии читается не больше этого числа строк таблицы. Данные версий
+сжаты zlib. Старые версии удаляются целыми цепочками — от снимка
+до следующего снимка, — так что оставшиеся цепочки всегда полные.
+"""
+import difflib
+import hashlib
+import json
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q, Subquery
+
+from .models import NoteRevision
+
+
+def content_digest(title, text):
+    """Отпечаток версии: одинаковое содержимое второй раз не пишем."""
+    return hashlib.sha1(f'{title}\0{text}'.encode()).hexdigest()
+
+
+def encode_snapshot(text):
+    return zlib.compress(text.encode())
+
+
+def encode_delta(old, new):
+    """
+    Разница двух текстов по строкам.
+
+    Операции: [начало, конец] — взять строки старого текста,
+    строка — вставить новый фрагмент.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    operations = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == 'equal':
+            operations.append([old_start, old_end])
+        elif new_start != new_end:
+            operations.append(''.join(new_lines[new_start:new_end]))
+    return zlib.compress(
+        json.dumps(operations, ensure_ascii=False).encode()
+    )
+
+
+def apply_delta(old, data):
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+    for operation in json.loads(zlib.decompress(data)):
+        if isinstance(operation, str):
+            parts.append(operation)
+        else:
+            parts.extend(old_lines[operation[0]:operation[1]])
+    return ''.join(parts)
+
+
+def load_chain(note, number=None):
+    """
+    Версии от ближайшего снимка до версии number (по умолчанию — до
+    последней) одним запросом, по возрастанию номера.
+    """
+    revisions = NoteRevision.objects.filter(note=note)
+    if number is not None:
+        revisions = revisions.filter(number__lte=number)
+    start = revisions.filter(is_snapshot=True).order_by('-number').values(
+        'number'
+    )[:1]
+    return list(
+        revisions.filter(number__gte=Subquery(start)).order_by('number')
+    )
+
+
+def rebuild_text(chain):
+    text = zlib.decompress(chain[0].data).decode()
+    for revision in chain[1:]:
+        text = apply_delta(text, revision.data)
+    return text
+
+
+def get_revision(note, number):
+    """
+    Версия заметки с восстановленным текстом в атрибуте text.
+
+    Если такой версии нет, бросает NoteRevision.DoesNotExist.
+    """
+    chain = load_chain(note, number)
+    if not chain or chain[-1].number != number:
+        raise NoteRevision.DoesNotExist(f'Нет версии {number}.')
+    revision = chain[-1]
+    revision.text = rebuild_text(chain)
+    return revision
+
+
+def record_first_revisions(notes):
+    """Первые версии для пачки заметок, созданных через bulk_create."""
+    return NoteRevision.objects.bulk_create(
+        NoteRevision(
+            note=note, number=1, title=note.title, is_snapshot=True,
+            digest=content_digest(note.title, note.text),
+            data=encode_snapshot(note.text),
+        )
+        for note in notes
+    )
+
+
+def record_retitled_revisions(notes):
+    """
+    Версии для пачки заметок, у которых поменялся только заголовок.
+
+    Номера последних версий и снимков берутся одним запросом на пачку.
+    Текст не менялся, поэтому вне очереди снимков разница с прошлой
+    версией — «весь прежний текст».
+    """
+    numbers = {
+        row['note']: row for row in NoteRevision.objects.filter(
+            note__in=notes
+        ).values('note').annotate(
+            last=Max('number'),
+            snapshot=Max('number', filter=Q(is_snapshot=True)),
+        )
+    }
+    revisions = []
+    for note in notes:
+        row = numbers.get(note.pk)
+        number = row['last'] + 1 if row else 1
+        is_snapshot = (
+            row is None
+            or number - row['snapshot']
+            >= settings.NOTES_REVISION_SNAPSHOT_EVERY
+        )
+        revisions.append(NoteRevision(
+            note=note, number=number, title=note.title,
+            is_snapshot=is_snapshot,
+            digest=content_digest(note.title, note.text),
+            data=(
+                encode_snapshot(note.text) if is_snapshot
+                else encode_delta(note.text, note.text)
+            ),
+        ))
+    return NoteRevision.objects.bulk_create(revisions)
+
+
+@transaction.atomic
+def record_revision(note, created=False):
+    """
+    Сохраняем текущее состояние заметки новой версией.
+
+    У только что созданной заметки версий нет, их не запрашиваем.
+    """
+    digest = content_digest(note.title, note.text)
+    chain = [] if created else load_chain(note)
+    if chain and chain[-1].digest == digest:
+        return None
+    number = chain[-1].number + 1 if chain else 1
+    is_snapshot = (
+        not chain
+        or number - chain[0].number >= settings.NOTES_REVISION_SNAPSHOT_EVERY
+    )
+    if is_snapshot:
+        data = encode_snapshot(note.text)
+    else:
+        data = encode_delta(rebuild_text(chain), note.text)
+    revision = NoteRevision.objects.create(
+        note=note, number=number, title=note.title,
+        is_snapshot=is_snapshot, digest=digest, data=data,
+    )
+    if is_snapshot and number > settings.NOTES_REVISIONS_KEEP:
+        prune_revisions(note, number)
+    return revision
+
+
+def prune_revisions(note, latest):
+    """
+    Удаляем цепочки, целиком лежащие до последних NOTES_REVISIONS_KEEP
+    версий. Цепочка, в которую попадает самая старая из оставляемых
+    версий, остаётся полностью.
+    """
+    oldest_kept = latest - settings.NOTES_REVISIONS_KEEP + 1
+    start = NoteRevision.objects.filter(
+        note=note, is_snapshot=True, number__lte=oldest_kept
+    ).order_by('-number').values('number')[:1]
+    return NoteRevision.objects.filter(
+        note=note, number__lt=Subquery(start)
+    ).delete()
+
+
+def restore_revision(note, revision):
+    """
+    Возвращаем заметке заголовок и текст версии из get_revision.
+
+    Восстановление сохраняется новой версией, история не теряется.
+    """
+    note.title = revision.title
+    note.text = revision.text
+    note.save()
+    return note
@@ -0,0 +1,169 @@
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = 'notes_note_fts'
+# Управляющие символы не встречаются в заметках, поэтому ими удобно
+# размечать совпадения до экранирования HTML.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+SNIPPET_TOKENS = 24
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Автор заметки лежит в индексе отдельным столбцом author — токеном
+# вида «a<id>». Условие на него входит в MATCH, поэтому FTS5
+# пересекает короткий список заметок автора со списком по слову,
+# а не перебирает заметки всех пользователей. Слова запроса ищутся
+# только в заголовке и тексте; в ранжировании author не участвует.
+SEARCH_SQL = f'''
+    SELECT note.id, note.slug, note.title,
+           snippet({FTS_TABLE}, -1, %s, %s, '…', {SNIPPET_TOKENS}),
+           bm25({FTS_TABLE}, 1.0, 1.0, 0.0) AS score
+    FROM {FTS_TABLE}
+    JOIN notes_note AS note ON note.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s AND note.deleted_at IS NULL
+    ORDER BY score, note.id
+    LIMIT %s
+'''
+UPSERT_SQL = (
+    f'INSERT OR REPLACE INTO {FTS_TABLE}(rowid, title, text, author) '
+    'VALUES (%s, %s, %s, %s)'
+)
+
+
+@dataclass
+class SearchResult:
+    pk: int
+    slug: str
+    title: str
+    snippet: str
+    score: float
+
+
+def build_match_query(query):
+    """
+    Превращаем пользовательский ввод в безопасный запрос FTS5.
+
+    Каждое слово берём в кавычки, чтобы операторы FTS5 во вводе
+    не приводили к синтаксическим ошибкам. Слова объединяются по И.
+    """
+    return ' '.join(f'"{token}"' for token in TOKEN_RE.findall(query))
+
+
+def author_token(author_id):
+    return f'a{author_id}'
+
+
+def author_match_query(author_id, match):
+    """Запрос FTS5 по словам match среди заметок автора."""
+    return f'author:"{author_token(author_id)}" AND {{title text}}:({match})'
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_END, '</mark>')
+    )
+
+
+def search_notes(author, query):
+    """Ищем среди заметок автора, лучшие по BM25 — первыми."""
+    match = build_match_query(query)
+    if not match:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL, [
+            MATCH_START, MATCH_END, author_match_query(author.pk, match),
+            settings.NOTES_SEARCH_RESULTS,
+        ])
+        return [
+            SearchResult(pk, slug, title, highlight(snippet), score)
+            for pk, slug, title, snippet, score in cursor.fetchall()
+        ]
+
+
+def index_row(note):
+    return note.pk, note.title, note.text, author_token(note.author_id)
+
+
+def index_note(note):
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT_SQL, index_row(note))
+
+
+def index_notes(notes):
+    """Индексируем пачку заметок, созданных в обход сигналов."""
+    with connection.cursor() as cursor:
+        cursor.executemany(UPSERT_SQL, [index_row(note) for note in notes])
+
+
+def unindex_note(note_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [note_id])
+
+
+def reindex(full=False, chunk_size=1000):
+    """
+    Догоняем индекс до таблицы заметок, не трогая уже проиндексированное.
+
+    Индексируются заметки, которых нет в индексе (например, созданные
+    через bulk_create), и удаляются записи об исчезнувших заметках.
+    full=True перестраивает индекс целиком. Каждая порция — отдельная
+    транзакция, чтобы не держать блокировку записи SQLite надолго.
+    Возвращает (проиндексировано, удалено).
+    """
+    from .models import Note
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if full:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            removed = cursor.rowcount
+        else:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid NOT IN '
+                '(SELECT id FROM notes_note WHERE deleted_at IS NULL)'
+            )
+            removed = cursor.rowcount
+    indexed = 0
+    last_id = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT id FROM notes_note WHERE id > %s '
+                'AND deleted_at IS NULL AND id NOT IN '
+                f'(SELECT rowid FROM {FTS_TABLE}) ORDER BY id LIMIT %s',
+                [last_id, chunk_size],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return indexed, removed
+        with transaction.atomic():
+            for note in Note.objects.filter(id__in=ids).only(
+                'id', 'title', 'text', 'author_id'
+            ):
+                index_note(note)
+        indexed += len(ids)
+        last_id = ids[-1]
+
+
+def retitle_indexed(note_ids, title):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {FTS_TABLE} SET title = %s WHERE rowid IN '
+            f'({", ".join(["%s"] * len(note_ids))})',
+            [title, *note_ids],
+        )
+
+
+def unindex_notes(note_ids):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+            f'({", ".join(["%s"] * len(note_ids))})',
+            note_ids,
+        )
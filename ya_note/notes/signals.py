@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import cache_user, forget_user
+from .models import Note
+from .revisions import record_revision
+from .search import index_note, unindex_note
+
+
+@receiver(post_save, sender=Note)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Переиндексируем заметку после сохранения, надгробие — убираем."""
+    if raw:
+        return
+    if instance.deleted_at is None:
+        index_note(instance)
+    else:
+        unindex_note(instance.pk)
+
+
+@receiver(post_delete, sender=Note)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Убираем удалённую заметку из поиска."""
+    unindex_note(instance.pk)
+
+
+@receiver(post_save, sender=Note)
+def save_revision(sender, instance, created=False, raw=False,
+                  update_fields=None, **kwargs):
+    """Записываем версию, если могли измениться заголовок или текст."""
+    if raw or instance.deleted_at is not None:
+        return
+    if update_fields is not None and not {'title', 'text'} & update_fields:
+        return
+    record_revision(instance, created=created)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_changed_user(sender, instance, **kwargs):
+    """Убираем пользователя из кэша: изменились данные или пароль."""
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_in)
+def remember_logged_in_user(sender, request, user, **kwargs):
+    """Первый запрос после входа не идёт за пользователем в базу."""
+    cache_user(user)
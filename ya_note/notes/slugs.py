@@ -0,0 +1,96 @@
+import re
+from functools import lru_cache
+
+from django.db.models import Q
+from pytils.translit import slugify
+
+FIRST_SUFFIX = 2
+# Основа для заголовков, от которых транслитерация ничего не оставляет:
+# знаки препинания, эмодзи.
+FALLBACK_SLUG = 'note'
+# Диапазонов в одном запросе: длинная цепочка OR упирается
+# в ограничение SQLite на глубину выражения.
+RANGES_PER_QUERY = 100
+
+
+@lru_cache(maxsize=4096)
+def transliterate(title):
+    """Транслитерация заголовка с кэшем для повторяющихся заголовков."""
+    return slugify(title)
+
+
+def slug_base(title, max_length):
+    """Основа slug из заголовка; никогда не пустая."""
+    return transliterate(title)[:max_length] or FALLBACK_SLUG
+
+
+def next_free_slug(base, taken, max_length):
+    """
+    Первый свободный среди taken вариант base или base-N.
+
+    Возвращает (slug, base). Если суффикс не влезает в max_length,
+    slug — None, а base укорочена: для неё нужно заново узнать
+    занятые варианты.
+    """
+    if base not in taken:
+        return base, base
+    suffix_re = re.compile(rf'^{re.escape(base)}-(\d+)$')
+    numbers = [
+        int(match[1]) for slug in taken
+        if (match := suffix_re.match(slug))
+    ]
+    suffix = f'-{max(numbers, default=FIRST_SUFFIX - 1) + 1}'
+    if len(base) + len(suffix) <= max_length:
+        return base + suffix, base
+    return None, base[:max_length - len(suffix)]
+
+
+def taken_slugs(queryset, bases):
+    """
+    Занятые варианты для нескольких основ — по диапазону уникального
+    индекса: slug = base или base-* (после «-» в ASCII идёт «.»).
+    """
+    bases = sorted(set(bases))
+    taken = set()
+    for start in range(0, len(bases), RANGES_PER_QUERY):
+        ranges = Q()
+        for base in bases[start:start + RANGES_PER_QUERY]:
+            ranges |= Q(slug__gte=base, slug__lt=base + '.')
+        taken.update(queryset.filter(ranges).values_list('slug', flat=True))
+    return taken
+
+
+def allocate_slug(queryset, title, max_length):
+    """
+    Подбираем свободный slug вида «заголовок» или «заголовок-N».
+
+    Занятые варианты берутся одним запросом (см. taken_slugs).
+    """
+    base = slug_base(title, max_length)
+    while True:
+        slug, base = next_free_slug(
+            base, taken_slugs(queryset, (base,)), max_length
+        )
+        if slug:
+            return slug
+
+
+def allocate_slugs(queryset, titles, max_length):
+    """
+    Подбираем свободные slug для пачки заголовков.
+
+    Занятые варианты для всей пачки берутся несколькими запросами
+    на всю пачку, а не на каждый заголовок; slug, выданные раньше
+    в той же пачке, тоже считаются занятыми.
+    """
+    bases = [slug_base(title, max_length) for title in titles]
+    taken = taken_slugs(queryset, bases)
+    slugs = []
+    for base in bases:
+        slug, base = next_free_slug(base, taken, max_length)
+        while slug is None:
+            taken.update(taken_slugs(queryset, (base,)))
+            slug, base = next_free_slug(base, taken, max_length)
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
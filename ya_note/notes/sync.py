@@ -0,0 +1,74 @@
+import base64
+import binascii
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Note
+
+CURSOR_SEPARATOR = '|'
+SYNC_FIELDS = ('id', 'slug', 'title', 'text', 'updated_at', 'deleted_at')
+
+
+def encode_cursor(note):
+    """Позиция (updated_at, id) последнего изменения в виде строки."""
+    raw = f'{note.updated_at.isoformat()}{CURSOR_SEPARATOR}{note.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        updated_at, pk = raw.split(CURSOR_SEPARATOR)
+        return datetime.fromisoformat(updated_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise BadRequest('Некорректный курсор синхронизации.')
+
+
+def serialize(note):
+    if note.deleted_at is not None:
+        return {'id': note.pk, 'deleted': True}
+    return {
+        'id': note.pk,
+        'slug': note.slug,
+        'title': note.title,
+        'text': note.text,
+        'updated_at': note.updated_at.isoformat(),
+    }
+
+
+def get_changes(author, cursor=None):
+    """
+    Изменения заметок автора после курсора, по порядку (updated_at, id).
+
+    Без курсора отдаём все живые заметки — это первая синхронизация.
+    Изменения моложе NOTES_SYNC_SETTLE_SECONDS не отдаём: транзакция,
+    начатая раньше, могла ещё не закоммититься, и её изменение
+    оказалось бы позади уже выданного курсора.
+    """
+    page_size = settings.NOTES_SYNC_PAGE_SIZE
+    settled = timezone.now() - timedelta(
+        seconds=settings.NOTES_SYNC_SETTLE_SECONDS
+    )
+    notes = Note.all_objects.filter(author=author, updated_at__lte=settled)
+    if cursor:
+        updated_at, pk = decode_cursor(cursor)
+        notes = notes.filter(
+            Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk)
+        )
+    else:
+        notes = notes.filter(deleted_at__isnull=True)
+    page = list(
+        notes.only(*SYNC_FIELDS).order_by('updated_at', 'id')[:page_size + 1]
+    )
+    has_more = len(page) > page_size
+    page = page[:page_size]
+    return {
+        'changes': [serialize(note) for note in page],
+        'cursor': encode_cursor(page[-1]) if page else cursor,
+        'has_more': has_more,
+    }
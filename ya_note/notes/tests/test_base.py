@@ -1,13 +1,29 @@
 from http import HTTPStatus
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
-from django.urls import reverse
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
 
 from notes.models import Note
+from .query_budget import check_query_budget, data_queries
 
 User = get_user_model()
 
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+# Файловые кэши проекта общие с запущенным сервером: тесты не должны
+# ни сбрасывать их, ни писать в них, поэтому на время тестов — память.
+MEMORY_CACHES = {
+    alias: {
+        **config,
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': f'test-{alias}',
+    } if config['BACKEND'] == FILE_CACHE else config
+    for alias, config in settings.CACHES.items()
+}
+
 NOTES_LIST_URL = reverse('notes:list')
 NOTE_ADD_URL = reverse('notes:add')
 NOTE_SLUG = 'note-slug'
@@ -18,6 +34,13 @@ SUCCESS_URL = reverse('notes:success')
 DETAIL_URL = reverse('notes:detail', args=(NOTE_SLUG,))
 EDIT_URL = reverse('notes:edit', args=(NOTE_SLUG,))
 DELETE_URL = reverse('notes:delete', args=(NOTE_SLUG,))
+SEARCH_URL = reverse('notes:search')
+SYNC_URL = reverse('notes:sync')
+HISTORY_URL = reverse('notes:history', args=(NOTE_SLUG,))
+REVISION_URL = reverse('notes:revision', args=(NOTE_SLUG, 1))
+EXPORT_URL = reverse('notes:export')
+IMPORT_URL = reverse('notes:import')
+BULK_URL = reverse('notes:bulk')
 
 REDIRECT_NOTES_LIST_URL = f'{LOGIN_URL}?next={NOTES_LIST_URL}'
 REDIRECT_NOTE_ADD_URL = f'{LOGIN_URL}?next={NOTE_ADD_URL}'
@@ -25,9 +48,32 @@ REDIRECT_SUCCESS_URL = f'{LOGIN_URL}?next={SUCCESS_URL}'
 REDIRECT_DETAIL_URL = f'{LOGIN_URL}?next={DETAIL_URL}'
 REDIRECT_EDIT_URL = f'{LOGIN_URL}?next={EDIT_URL}'
 REDIRECT_DELETE_URL = f'{LOGIN_URL}?next={DELETE_URL}'
+REDIRECT_HISTORY_URL = f'{LOGIN_URL}?next={HISTORY_URL}'
+REDIRECT_IMPORT_URL = f'{LOGIN_URL}?next={IMPORT_URL}'
+
+
+class QueryBudgetMixin:
+    """Проверка бюджета SQL-запросов страницы для TestCase."""
+
+    def assert_query_budget(self, method, url, budget=None, **kwargs):
+        """
+        Выполняет method(url, **kwargs) и сверяет запросы с бюджетом.
+
+        Возвращает ответ, чтобы тест мог проверить его дальше.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = method(url, **kwargs)
+        view_name = resolve(url.split('?')[0]).view_name
+        problems = check_query_budget(
+            view_name, data_queries(context.captured_queries), budget
+        )
+        if problems:
+            self.fail('\n'.join(problems))
+        return response
 
 
-class BaseTest(TestCase):
+@override_settings(CACHES=MEMORY_CACHES)
+class BaseTest(QueryBudgetMixin, TestCase):
 
     @classmethod
     def setUpTestData(cls):
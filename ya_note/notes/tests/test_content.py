@@ -1,4 +1,16 @@
-from .test_base import BaseTest, NOTES_LIST_URL, NOTE_ADD_URL, EDIT_URL
+from http import HTTPStatus
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+
+from notes.models import Note
+from notes.rendering import cache_key
+from .test_base import (
+    BaseTest, NOTES_LIST_URL, NOTE_ADD_URL, EDIT_URL, DETAIL_URL, SEARCH_URL,
+    HISTORY_URL, REVISION_URL
+)
 
 
 class TestContent(BaseTest):
@@ -8,12 +20,43 @@ class TestContent(BaseTest):
         notes = response.context['object_list']
         self.assertIn(self.note, notes)
 
-        author_note = notes.get(id=self.note.id)
+        author_note = notes[notes.index(self.note)]
         self.assertEqual(author_note.title, self.note.title)
         self.assertEqual(author_note.text, self.note.text)
         self.assertEqual(author_note.slug, self.note.slug)
         self.assertEqual(author_note.author, self.note.author)
 
+    def test_notes_list_is_paginated_by_id(self):
+        Note.objects.bulk_create(
+            Note(title='Заметка', text='Текст', slug=f'page-{index}',
+                 author=self.author)
+            for index in range(5)
+        )
+        expected = list(
+            Note.objects.filter(author=self.author).order_by('id')
+        )
+        seen = []
+        url = NOTES_LIST_URL
+        with self.settings(NOTES_COUNT_ON_LIST_PAGE=2):
+            while url:
+                response = self.author_client.get(url)
+                page = response.context['object_list']
+                self.assertLessEqual(len(page), 2)
+                seen.extend(page)
+                next_after = response.context['next_after']
+                url = next_after and f'{NOTES_LIST_URL}?after={next_after}'
+        self.assertEqual(seen, expected)
+
+    def test_list_rejects_malformed_cursor(self):
+        for after in ('abc', '²', '1.5'):
+            with self.subTest(after=after):
+                response = self.author_client.get(
+                    NOTES_LIST_URL, {'after': after}
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+
     def test_note_not_in_list_for_another_user(self):
         response = self.not_author_client.get(NOTES_LIST_URL)
         notes = response.context['object_list']
@@ -29,3 +72,81 @@ class TestContent(BaseTest):
             with self.subTest(url=url, description=description):
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
+
+    def test_pages_fit_query_budget(self):
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Текст',
+                slug=f'note-{index}',
+                author=self.author,
+            )
+            for index in range(10)
+        )
+        for url in (
+            NOTES_LIST_URL, NOTE_ADD_URL, DETAIL_URL, EDIT_URL,
+            HISTORY_URL, REVISION_URL,
+        ):
+            with self.subTest(url=url):
+                self.assert_query_budget(self.author_client.get, url)
+
+    def test_search_finds_only_own_notes(self):
+        Note.objects.create(
+            title='Чужая', text='Текст заметки про <b>кота</b>',
+            slug='foreign', author=self.not_author,
+        )
+        Note.objects.create(
+            title='Про кота', text='Кот, кот и ещё <b>кот</b>',
+            slug='cat', author=self.author,
+        )
+        response = self.author_client.get(SEARCH_URL, {'q': 'кот'})
+        results = response.context['results']
+        self.assertEqual([result.slug for result in results], ['cat'])
+        self.assertIn('<mark>кот</mark>', results[0].snippet)
+        self.assertIn('&lt;b&gt;', results[0].snippet)
+
+    def test_search_ignores_author_column(self):
+        # Служебный токен автора в индексе не находится как слово.
+        response = self.author_client.get(
+            SEARCH_URL, {'q': f'a{self.author.pk}'}
+        )
+        self.assertEqual(list(response.context['results']), [])
+
+    def test_search_index_follows_edits_and_reindex(self):
+        self.note.title = 'Метеорит'
+        self.note.save()
+        response = self.author_client.get(SEARCH_URL, {'q': 'метеорит'})
+        self.assertEqual(len(response.context['results']), 1)
+
+        Note.objects.bulk_create([Note(
+            title='Метеорит', text='Снова', slug='bulk', author=self.author
+        )])
+        call_command('reindex_notes', stdout=StringIO())
+        response = self.author_client.get(SEARCH_URL, {'q': 'метеорит'})
+        self.assertEqual(len(response.context['results']), 2)
+
+    def test_detail_renders_markdown_safely_and_caches_by_text(self):
+        cache = caches[settings.NOTES_MARKDOWN_CACHE]
+        cache.clear()
+        text = (
+            '**Важно** <script>alert(1)</script>\n\n'
+            '[ссылка](https://example.com) [плохая](java&#115;cript:alert(1))'
+        )
+        Note.objects.filter(id=self.note.id).update(text=text)
+
+        html = str(self.author_client.get(DETAIL_URL).context['text_html'])
+        self.assertIn('<strong>Важно</strong>', html)
+        self.assertIn('&lt;script&gt;', html)
+        self.assertIn('<a href="https://example.com">', html)
+        self.assertIn('<a>плохая</a>', html)
+        self.assertEqual(cache.get(cache_key(text)), html)
+
+        cache.set(cache_key(text), 'из кэша')
+        response = self.author_client.get(DETAIL_URL)
+        self.assertEqual(response.context['text_html'], 'из кэша')
+
+        Note.objects.filter(id=self.note.id).update(text='*Новый* текст')
+        response = self.author_client.get(DETAIL_URL)
+        self.assertEqual(
+            response.context['text_html'], '<p><em>Новый</em> текст</p>'
+        )
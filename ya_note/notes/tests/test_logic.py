@@ -1,12 +1,28 @@
 from http import HTTPStatus
+import json
+from io import BytesIO, StringIO
+from zipfile import ZipFile
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from pytils.translit import slugify
 
+from notes.backends import forget_user
 from notes.forms import WARNING
 from notes.models import Note
+from notes.revisions import get_revision
+from notes.search import search_notes
 from .test_base import (
-    BaseTest, NOTE_ADD_URL, EDIT_URL,
-    DELETE_URL, SUCCESS_URL, REDIRECT_NOTE_ADD_URL
+    BaseTest, NOTE_ADD_URL, EDIT_URL, NOTES_LIST_URL,
+    DELETE_URL, SUCCESS_URL, REDIRECT_NOTE_ADD_URL, SYNC_URL, REVISION_URL,
+    EXPORT_URL, IMPORT_URL, NOTE_SLUG, BULK_URL, DETAIL_URL,
+    REDIRECT_DETAIL_URL
 )
 
 
@@ -14,7 +30,9 @@ class TestLogic(BaseTest):
 
     def test_author_can_create_note(self):
         initial_notes_ids = set(Note.objects.values_list('id', flat=True))
-        response = self.author_client.post(NOTE_ADD_URL, data=self.form_data)
+        response = self.assert_query_budget(
+            self.author_client.post, NOTE_ADD_URL, data=self.form_data
+        )
         self.assertRedirects(response, SUCCESS_URL)
 
         final_notes_ids = set(Note.objects.values_list('id', flat=True))
@@ -59,6 +77,40 @@ class TestLogic(BaseTest):
         self.assertEqual(new_note.text, self.form_data['text'])
         self.assertEqual(new_note.author, self.author)
 
+    def test_punctuation_title_gets_fallback_slug(self):
+        self.form_data.update(title='???', slug='')
+        for _ in range(2):
+            response = self.author_client.post(
+                NOTE_ADD_URL, data=self.form_data
+            )
+            self.assertRedirects(response, SUCCESS_URL)
+        result = self.import_file(
+            self.author_client, 'notes.jsonl',
+            json.dumps({'title': '!!!', 'text': 'Текст'}).encode(),
+        )
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(
+            set(Note.objects.filter(
+                title__in=('???', '!!!')
+            ).values_list('slug', flat=True)),
+            {'note', 'note-2', 'note-3'},
+        )
+        self.assertEqual(
+            self.author_client.get(NOTES_LIST_URL).status_code, self.OK
+        )
+
+    def test_duplicate_title_gets_next_free_slug(self):
+        del self.form_data['slug']
+        base_slug = slugify(self.form_data['title'])
+        for _ in range(3):
+            self.author_client.post(NOTE_ADD_URL, data=self.form_data)
+        self.assertEqual(
+            set(Note.objects.filter(
+                title=self.form_data['title']
+            ).values_list('slug', flat=True)),
+            {base_slug, f'{base_slug}-2', f'{base_slug}-3'},
+        )
+
     def test_author_can_edit_note(self):
         response = self.author_client.post(EDIT_URL, data=self.form_data)
         self.assertRedirects(response, SUCCESS_URL)
@@ -87,6 +139,26 @@ class TestLogic(BaseTest):
         self.assertEqual(Note.objects.count(), initial_count - 1)
         self.assertFalse(Note.objects.filter(id=self.note.id).exists())
 
+    def test_deleted_note_slug_can_be_reused(self):
+        self.author_client.post(DELETE_URL)
+        self.form_data['slug'] = NOTE_SLUG
+        response = self.author_client.post(NOTE_ADD_URL, data=self.form_data)
+        self.assertRedirects(response, SUCCESS_URL)
+        self.assertEqual(
+            Note.all_objects.get(id=self.note.id).slug,
+            f'{NOTE_SLUG}@deleted-{self.note.id}',
+        )
+
+        bulk_note = Note.objects.create(
+            title='Черновик', text='Текст', slug='draft', author=self.author
+        )
+        self.author_client.post(BULK_URL, data={
+            'action': 'delete', 'ids': [bulk_note.id],
+        })
+        self.form_data['slug'] = 'draft'
+        response = self.author_client.post(NOTE_ADD_URL, data=self.form_data)
+        self.assertRedirects(response, SUCCESS_URL)
+
     def test_not_author_cant_delete_note(self):
         initial_notes_ids = set(Note.objects.values_list('id', flat=True))
         response = self.not_author_client.post(DELETE_URL)
@@ -99,3 +171,351 @@ class TestLogic(BaseTest):
         self.assertEqual(existing_note.text, self.note.text)
         self.assertEqual(existing_note.slug, self.note.slug)
         self.assertEqual(existing_note.author, self.note.author)
+
+    def test_sync_returns_only_changes_after_cursor(self):
+        with self.settings(NOTES_SYNC_SETTLE_SECONDS=0):
+            first = self.author_client.get(SYNC_URL).json()
+            self.assertEqual(
+                [change['id'] for change in first['changes']], [self.note.id]
+            )
+            cursor = first['cursor']
+
+            unchanged = self.author_client.get(SYNC_URL, {'cursor': cursor})
+            self.assertEqual(unchanged.json()['changes'], [])
+            not_modified = self.author_client.get(
+                SYNC_URL, {'cursor': cursor},
+                HTTP_IF_NONE_MATCH=unchanged['ETag'],
+            )
+            self.assertEqual(not_modified.status_code, HTTPStatus.NOT_MODIFIED)
+
+            self.author_client.post(EDIT_URL, data=self.form_data)
+            edited = self.author_client.get(
+                SYNC_URL, {'cursor': cursor}
+            ).json()
+            self.assertEqual(
+                edited['changes'][0]['title'], self.form_data['title']
+            )
+
+            self.author_client.post(
+                reverse('notes:delete', args=(self.form_data['slug'],))
+            )
+            deleted = self.author_client.get(
+                SYNC_URL, {'cursor': edited['cursor']}
+            ).json()
+            self.assertEqual(
+                deleted['changes'], [{'id': self.note.id, 'deleted': True}]
+            )
+
+    def raw_text_type(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT typeof(text) FROM notes_note WHERE id = %s',
+                [self.note.id]
+            )
+            return cursor.fetchone()[0]
+
+    def test_long_text_is_stored_compressed(self):
+        long_text = 'Строка журнала. ' * 200
+        with self.settings(NOTES_TEXT_COMPRESS_THRESHOLD=float('inf')):
+            Note.objects.filter(id=self.note.id).update(text=long_text)
+        self.assertEqual(self.raw_text_type(), 'text')
+        self.assertEqual(Note.objects.get(id=self.note.id).text, long_text)
+
+        call_command('compress_notes', stdout=StringIO())
+        self.assertEqual(self.raw_text_type(), 'blob')
+        self.assertEqual(Note.objects.get(id=self.note.id).text, long_text)
+
+        call_command(
+            'compress_notes', decompress=True, stdout=StringIO()
+        )
+        self.assertEqual(self.raw_text_type(), 'text')
+        self.assertEqual(Note.objects.get(id=self.note.id).text, long_text)
+
+    def test_seed_data_can_run_twice_with_same_seed(self):
+        users = get_user_model().objects.count()
+        notes = Note.objects.count()
+        for _ in range(2):
+            call_command(
+                'seed_data', users=3, notes=5, seed=0, stdout=StringIO()
+            )
+        self.assertEqual(get_user_model().objects.count(), users + 6)
+        self.assertEqual(Note.objects.count(), notes + 10)
+
+    def test_author_can_restore_revision(self):
+        self.author_client.post(EDIT_URL, data=self.form_data)
+        response = self.author_client.post(
+            reverse('notes:revision', args=(self.form_data['slug'], 1))
+        )
+        self.assertRedirects(response, SUCCESS_URL)
+
+        restored_note = Note.objects.get(id=self.note.id)
+        self.assertEqual(restored_note.title, self.note.title)
+        self.assertEqual(restored_note.text, self.note.text)
+        self.assertEqual(
+            list(restored_note.revisions.values_list('number', flat=True)),
+            [3, 2, 1],
+        )
+
+    def test_not_author_cant_restore_revision(self):
+        response = self.not_author_client.post(REVISION_URL)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(self.note.revisions.count(), 1)
+
+    def test_revisions_are_deltas_between_snapshots_and_pruned(self):
+        texts = [
+            ''.join(f'Строка {line}\n' for line in range(version, 30))
+            for version in range(12)
+        ]
+        with self.settings(
+            NOTES_REVISION_SNAPSHOT_EVERY=3, NOTES_REVISIONS_KEEP=4
+        ):
+            for text in texts:
+                self.note.text = text
+                self.note.save()
+        revisions = list(self.note.revisions.order_by('number'))
+        # Версия 1 — исходный текст заметки, дальше 12 правок.
+        self.assertEqual(revisions[-1].number, 13)
+        self.assertEqual(
+            [revision.number for revision in revisions
+             if revision.is_snapshot],
+            [10, 13],
+        )
+        self.assertEqual(revisions[0].number, 10)
+        for revision in revisions:
+            with self.subTest(number=revision.number):
+                self.assertEqual(
+                    get_revision(self.note, revision.number).text,
+                    texts[revision.number - 2],
+                )
+
+    def post_edit_and_capture_updates(self, data):
+        with CaptureQueriesContext(connection) as context:
+            response = self.author_client.post(EDIT_URL, data=data)
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "notes_note"')
+        ]
+        self.assertRedirects(response, SUCCESS_URL)
+        return updates
+
+    def test_unchanged_edit_skips_database(self):
+        updated_at = Note.objects.get(id=self.note.id).updated_at
+        updates = self.post_edit_and_capture_updates({
+            'title': self.note.title,
+            'text': self.note.text,
+            'slug': self.note.slug,
+        })
+        self.assertEqual(updates, [])
+        self.assertEqual(
+            Note.objects.get(id=self.note.id).updated_at, updated_at
+        )
+        self.assertEqual(self.note.revisions.count(), 1)
+
+    def test_edit_updates_only_changed_columns(self):
+        updates = self.post_edit_and_capture_updates({
+            'title': self.form_data['title'],
+            'text': self.note.text,
+            'slug': self.note.slug,
+        })
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"title"', updates[0])
+        self.assertIn('"updated_at"', updates[0])
+        self.assertNotIn('"text"', updates[0])
+        self.assertNotIn('"slug"', updates[0])
+        self.assertEqual(
+            Note.objects.get(id=self.note.id).title, self.form_data['title']
+        )
+
+    def export(self, export_format):
+        response = self.author_client.get(
+            EXPORT_URL, {'format': export_format}
+        )
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def import_file(self, client, name, content):
+        return self.assert_query_budget(
+            client.post, IMPORT_URL,
+            data={'file': SimpleUploadedFile(name, content)},
+        ).context['result']
+
+    def test_export_import_round_trip(self):
+        Note.objects.create(
+            title='Вторая', text='Строка 1\nСтрока 2', author=self.author,
+        )
+        own_notes = list(
+            Note.objects.filter(author=self.author)
+            .order_by('id').values_list('title', 'text')
+        )
+        for export_format, name in (('jsonl', 'notes.jsonl'),
+                                    ('md', 'notes.zip')):
+            with self.subTest(export_format=export_format):
+                Note.objects.filter(author=self.not_author).delete()
+                result = self.import_file(
+                    self.not_author_client, name, self.export(export_format)
+                )
+                self.assertEqual(result.imported, len(own_notes))
+                self.assertEqual(result.errors, [])
+                imported = Note.objects.filter(author=self.not_author)
+                self.assertEqual(
+                    list(imported.order_by('id').values_list(
+                        'title', 'text'
+                    )),
+                    own_notes,
+                )
+                # slug автора заняты, поэтому получили суффиксы.
+                self.assertIn(
+                    f'{NOTE_SLUG}-2', imported.values_list('slug', flat=True)
+                )
+
+    def test_markdown_export_is_zip_of_notes(self):
+        with ZipFile(BytesIO(self.export('md'))) as archive:
+            self.assertEqual(archive.namelist(), [f'{self.note.slug}.md'])
+            self.assertEqual(
+                archive.read(f'{self.note.slug}.md').decode(),
+                f'# {self.note.title}\n\n{self.note.text}\n',
+            )
+
+    def test_import_batch_gets_unique_slugs_search_and_history(self):
+        lines = [
+            json.dumps({'title': 'Список покупок', 'text': f'Молоко {index}'})
+            for index in range(30)
+        ]
+        lines += ['не json', json.dumps({'title': 'Без текста'})]
+        with self.settings(NOTES_IMPORT_BATCH_SIZE=50):
+            result = self.import_file(
+                self.author_client, 'notes.jsonl', '\n'.join(lines).encode()
+            )
+        self.assertEqual(result.imported, 30)
+        self.assertEqual(len(result.errors), 2)
+        imported = Note.objects.filter(title='Список покупок')
+        slugs = set(imported.values_list('slug', flat=True))
+        base_slug = slugify('Список покупок')
+        self.assertEqual(
+            slugs,
+            {base_slug} | {f'{base_slug}-{number}' for number in range(2, 31)},
+        )
+        self.assertEqual(len(search_notes(self.author, 'молоко')), 30)
+        self.assertEqual(
+            imported.filter(revisions__number=1).count(), 30
+        )
+
+    def test_import_rejects_oversized_line(self):
+        lines = [
+            json.dumps({'title': title, 'text': text}, ensure_ascii=False)
+            for title, text in (
+                ('Первая', 'Коротко'),
+                ('Длинная', 'Ы' * 100),
+                ('Третья', 'Тоже коротко'),
+            )
+        ]
+        with self.settings(NOTES_IMPORT_MAX_NOTE_BYTES=100):
+            result = self.import_file(
+                self.author_client, 'notes.jsonl', '\n'.join(lines).encode()
+            )
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(result.errors, ['Строка 2: слишком большая'])
+        self.assertFalse(Note.objects.filter(title='Длинная').exists())
+
+    def create_own_notes(self, count):
+        return [
+            Note.objects.create(title=f'Заметка {index}', text=f'Кот {index}',
+                                slug=f'bulk-{index}', author=self.author)
+            for index in range(count)
+        ]
+
+    def test_bulk_delete_touches_only_own_notes(self):
+        notes = self.create_own_notes(4)
+        foreign = Note.objects.create(
+            title='Чужая', text='Текст', slug='foreign',
+            author=self.not_author,
+        )
+        ids = [notes[0].id, notes[1].id, self.note.id, foreign.id]
+        response = self.assert_query_budget(
+            self.author_client.post, BULK_URL,
+            data={'action': 'delete', 'ids': ids},
+        )
+        self.assertRedirects(response, SUCCESS_URL)
+        self.assertEqual(
+            set(Note.objects.values_list('id', flat=True)),
+            {notes[2].id, notes[3].id, foreign.id},
+        )
+        self.assertEqual(
+            Note.all_objects.filter(deleted_at__isnull=False).count(), 3
+        )
+
+    def test_bulk_retitle_in_batches(self):
+        notes = self.create_own_notes(5)
+        with self.settings(NOTES_BULK_BATCH_SIZE=2):
+            response = self.author_client.post(BULK_URL, data={
+                'action': 'retitle', 'title': 'Котики',
+                'ids': [note.id for note in notes],
+            })
+        self.assertRedirects(response, SUCCESS_URL)
+        self.assertEqual(
+            Note.objects.filter(title='Котики').count(), len(notes)
+        )
+        self.assertEqual(Note.objects.get(id=self.note.id).title,
+                         self.note.title)
+        self.assertEqual(len(search_notes(self.author, 'котики')), len(notes))
+        revision = get_revision(notes[0], 2)
+        self.assertEqual(
+            (revision.title, revision.text), ('Котики', notes[0].text)
+        )
+
+    def test_bulk_retitle_requires_title(self):
+        response = self.author_client.post(BULK_URL, data={
+            'action': 'retitle', 'ids': [self.note.id],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('title', response.context['form'].errors)
+        self.assertEqual(Note.objects.get(id=self.note.id).title,
+                         self.note.title)
+
+    def test_note_creation_rate_limit_answers_429(self):
+        # Корзины прежних тестов не должны влиять на этот и наоборот.
+        cache = caches[settings.NOTES_RATE_LIMIT_CACHE]
+        cache.clear()
+        self.addCleanup(cache.clear)
+        initial_count = Note.objects.count()
+        limits = {'notes:add': {'user': (2, 60), 'ip': (10, 60)}}
+        with self.settings(NOTES_RATE_LIMITS=limits):
+            responses = [
+                self.author_client.post(NOTE_ADD_URL, data={
+                    **self.form_data, 'slug': f'limited-{number}',
+                })
+                for number in range(3)
+            ]
+            form_response = self.author_client.get(NOTE_ADD_URL)
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [self.FOUND, self.FOUND, HTTPStatus.TOO_MANY_REQUESTS],
+        )
+        self.assertGreater(int(responses[-1]['Retry-After']), 0)
+        self.assertEqual(Note.objects.count(), initial_count + 2)
+        self.assertEqual(form_response.status_code, self.OK)
+
+    def test_session_and_user_come_from_cache(self):
+        client = self.client_class()
+        client.force_login(self.author)
+        with CaptureQueriesContext(connection) as context:
+            client.get(DETAIL_URL)
+        tables = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('django_session', tables)
+        self.assertNotIn('auth_user', tables)
+
+        # Потерянная в кэше сессия загружается из базы.
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        self.assertEqual(client.get(DETAIL_URL).status_code, self.OK)
+
+    def test_password_change_drops_cached_user(self):
+        client = self.client_class()
+        client.force_login(self.author)
+        self.assertEqual(client.get(DETAIL_URL).status_code, self.OK)
+        # Откат транзакции теста не сбросит кэш, а в нём останется
+        # пользователь с новым паролем — и разлогинит клиентов
+        # следующих тестов.
+        self.addCleanup(forget_user, self.author.pk)
+        self.author.set_password('новый пароль')
+        self.author.save()
+        self.assertRedirects(client.get(DETAIL_URL), REDIRECT_DETAIL_URL)
@@ -4,11 +4,14 @@ from .test_base import BaseTest, NOTES_LIST_URL, NOTE_ADD_URL
 from .test_base import (
     REDIRECT_NOTES_LIST_URL, REDIRECT_NOTE_ADD_URL,
     REDIRECT_SUCCESS_URL, REDIRECT_DETAIL_URL,
-    REDIRECT_EDIT_URL, REDIRECT_DELETE_URL,
+    REDIRECT_EDIT_URL, REDIRECT_DELETE_URL, REDIRECT_HISTORY_URL,
+    REDIRECT_IMPORT_URL,
     SUCCESS_URL, DETAIL_URL,
     EDIT_URL, DELETE_URL,
     SIGNUP_URL, LOGIN_URL,
-    HOME_URL
+    HOME_URL, SEARCH_URL,
+    HISTORY_URL, REVISION_URL,
+    EXPORT_URL, IMPORT_URL
 )
 
 User = get_user_model()
@@ -25,21 +28,32 @@ class TestRoutes(BaseTest):
             (self.not_author_client, NOTES_LIST_URL, self.OK),
             (self.not_author_client, NOTE_ADD_URL, self.OK),
             (self.not_author_client, SUCCESS_URL, self.OK),
+            (self.not_author_client, SEARCH_URL, self.OK),
+            (self.not_author_client, EXPORT_URL, self.OK),
+            (self.not_author_client, IMPORT_URL, self.OK),
 
             (self.author_client, DETAIL_URL, self.OK),
             (self.author_client, EDIT_URL, self.OK),
             (self.author_client, DELETE_URL, self.OK),
+            (self.author_client, HISTORY_URL, self.OK),
+            (self.author_client, REVISION_URL, self.OK),
 
             (self.not_author_client, DETAIL_URL, self.NOT_FOUND),
             (self.not_author_client, EDIT_URL, self.NOT_FOUND),
             (self.not_author_client, DELETE_URL, self.NOT_FOUND),
+            (self.not_author_client, HISTORY_URL, self.NOT_FOUND),
+            (self.not_author_client, REVISION_URL, self.NOT_FOUND),
 
             (self.client, NOTES_LIST_URL, self.FOUND),
             (self.client, NOTE_ADD_URL, self.FOUND),
             (self.client, SUCCESS_URL, self.FOUND),
+            (self.client, SEARCH_URL, self.FOUND),
             (self.client, DETAIL_URL, self.FOUND),
             (self.client, EDIT_URL, self.FOUND),
             (self.client, DELETE_URL, self.FOUND),
+            (self.client, HISTORY_URL, self.FOUND),
+            (self.client, EXPORT_URL, self.FOUND),
+            (self.client, IMPORT_URL, self.FOUND),
         ]
 
         for client, url, expected_status in test_cases:
@@ -54,6 +68,8 @@ class TestRoutes(BaseTest):
             (DETAIL_URL, REDIRECT_DETAIL_URL),
             (EDIT_URL, REDIRECT_EDIT_URL),
             (DELETE_URL, REDIRECT_DELETE_URL),
+            (HISTORY_URL, REDIRECT_HISTORY_URL),
+            (IMPORT_URL, REDIRECT_IMPORT_URL),
         ]
 
         for url, expected_url in urls_to_check:
@@ -0,0 +1,215 @@
+"""
+Выгрузка и загрузка заметок пачками.
+
+Выгрузка отдаёт заметки автора порциями по ключу id, не собирая
+весь ответ в памяти: JSONL — строка на заметку, архив — по файлу
+Markdown на заметку. Загрузка читает файл построчно (или архив
+по одному файлу) и сохраняет заметки через bulk_create пачками
+по NOTES_IMPORT_BATCH_SIZE.
+"""
+import json
+import zipfile
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Note
+from .revisions import record_first_revisions
+from .search import index_notes
+from .slugs import allocate_slugs
+
+EXPORT_FIELDS = ('id', 'slug', 'title', 'text', 'updated_at')
+EXPORT_CHUNK_SIZE = 500
+MARKDOWN_SUFFIX = '.md'
+TITLE_PREFIX = '# '
+
+
+def iter_notes(author):
+    """Живые заметки автора порциями по ключу id."""
+    notes = Note.objects.filter(author=author).only(*EXPORT_FIELDS)
+    last_id = 0
+    while chunk := list(
+        notes.filter(id__gt=last_id).order_by('id')[:EXPORT_CHUNK_SIZE]
+    ):
+        yield from chunk
+        last_id = chunk[-1].id
+
+
+def export_jsonl(author):
+    for note in iter_notes(author):
+        yield json.dumps({
+            'slug': note.slug,
+            'title': note.title,
+            'text': note.text,
+            'updated_at': note.updated_at.isoformat(),
+        }, ensure_ascii=False) + '\n'
+
+
+def to_markdown(title, text):
+    return f'{TITLE_PREFIX}{title}\n\n{text}\n'
+
+
+def from_markdown(content):
+    """Заголовок — первая строка вида «# …», остальное — текст."""
+    first_line, _, rest = content.partition('\n')
+    if not first_line.startswith(TITLE_PREFIX):
+        return None, content.strip('\n')
+    return first_line[len(TITLE_PREFIX):].strip(), rest.strip('\n')
+
+
+class StreamBuffer:
+    """
+    Файл только для записи, который отдаёт накопленное по запросу.
+
+    zipfile пишет в него архив последовательно: без tell() и seek()
+    размеры файлов уходят в дескрипторы данных после содержимого.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def export_markdown_zip(author):
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for note in iter_notes(author):
+            with archive.open(note.slug + MARKDOWN_SUFFIX, 'w') as member:
+                member.write(to_markdown(note.title, note.text).encode())
+            yield buffer.pop()
+    yield buffer.pop()
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    errors: list = field(default_factory=list)
+
+
+def read_jsonl(upload, result):
+    """
+    Записи из JSONL; ошибочные строки пропускаем и запоминаем.
+
+    Строку читаем не больше предела NOTES_IMPORT_MAX_NOTE_BYTES:
+    длинную отклоняем, а её остаток дочитываем кусками и выбрасываем.
+    """
+    limit = settings.NOTES_IMPORT_MAX_NOTE_BYTES
+    number = 0
+    while line := upload.readline(limit + 1):
+        number += 1
+        if len(line) > limit and not line.endswith(b'\n'):
+            result.errors.append(f'Строка {number}: слишком большая')
+            while line and not line.endswith(b'\n'):
+                line = upload.readline(limit + 1)
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError('ожидался объект')
+            yield record
+        except ValueError as error:
+            result.errors.append(f'Строка {number}: {error}')
+
+
+def read_markdown_zip(upload, result):
+    """Записи из архива Markdown, по одному файлу за раз."""
+    limit = settings.NOTES_IMPORT_MAX_NOTE_BYTES
+    with zipfile.ZipFile(upload) as archive:
+        for info in archive.infolist():
+            path = PurePosixPath(info.filename)
+            if info.is_dir() or path.suffix != MARKDOWN_SUFFIX:
+                continue
+            # Размер из оглавления архива может быть неправдой,
+            # поэтому читаем не больше предела и проверяем ещё раз.
+            with archive.open(info) as member:
+                content = member.read(limit + 1)
+            if info.file_size > limit or len(content) > limit:
+                result.errors.append(f'{info.filename}: слишком большой')
+                continue
+            try:
+                title, text = from_markdown(content.decode())
+            except UnicodeDecodeError:
+                result.errors.append(f'{info.filename}: не UTF-8')
+                continue
+            yield {'slug': path.stem, 'title': title, 'text': text}
+
+
+def build_note(author, record):
+    """
+    Заметка из записи и основа для подбора её slug — присланный slug,
+    иначе заголовок. None, если запись негодная.
+    """
+    title = record.get('title')
+    text = record.get('text')
+    if not isinstance(text, str) or not text.strip():
+        return None
+    if not isinstance(title, str) or not title.strip():
+        title = Note._meta.get_field('title').get_default()
+    slug = record.get('slug')
+    note = Note(
+        author=author,
+        title=title.strip()[:Note._meta.get_field('title').max_length],
+        text=text,
+    )
+    return note, slug if isinstance(slug, str) and slug else note.title
+
+
+def save_batch(notes, slug_bases):
+    """
+    Сохраняем пачку одной транзакцией.
+
+    Транзакции SQLite в проекте сразу берут блокировку записи,
+    поэтому slug, свободные при подборе, никто не займёт до вставки.
+    bulk_create не вызывает сигналы: поиск и историю обновляем здесь.
+    """
+    max_length = Note._meta.get_field('slug').max_length
+    with transaction.atomic():
+        slugs = allocate_slugs(
+            Note.all_objects.all(), slug_bases, max_length
+        )
+        for note, slug in zip(notes, slugs):
+            note.slug = slug
+        Note.objects.bulk_create(notes)
+        index_notes(notes)
+        record_first_revisions(notes)
+
+
+def import_notes(author, upload):
+    """
+    Загружаем заметки из JSONL или архива Markdown.
+
+    Формат определяется по содержимому файла.
+    """
+    result = ImportResult()
+    is_zip = zipfile.is_zipfile(upload)
+    upload.seek(0)
+    read = read_markdown_zip if is_zip else read_jsonl
+    records = read(upload, result)
+    built = (build_note(author, record) for record in records)
+    batch_size = settings.NOTES_IMPORT_BATCH_SIZE
+    while batch := list(islice(built, batch_size)):
+        valid = [pair for pair in batch if pair is not None]
+        skipped = len(batch) - len(valid)
+        if skipped:
+            result.errors.append(f'Пропущено записей без текста: {skipped}')
+        if valid:
+            notes, slug_bases = zip(*valid)
+            save_batch(notes, slug_bases)
+            result.imported += len(notes)
+    return result
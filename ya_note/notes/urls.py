@@ -10,6 +10,17 @@ urlpatterns = [
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
+    path('history/<slug:slug>/', views.NoteHistory.as_view(), name='history'),
+    path(
+        'history/<slug:slug>/<int:number>/',
+        views.NoteRevisionRestore.as_view(),
+        name='revision',
+    ),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('notes/bulk/', views.NoteBulk.as_view(), name='bulk'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
+    path('export/', views.NoteExport.as_view(), name='export'),
+    path('import/', views.NoteImport.as_view(), name='import'),
+    path('api/sync/', views.NoteSync.as_view(), name='sync'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
 ]
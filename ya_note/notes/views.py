@@ -1,9 +1,28 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import BadRequest
+from django.db import IntegrityError
+from django.http import (
+    Http404, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+)
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, set_response_etag
 from django.views import generic
 
-from .forms import NoteForm
-from .models import Note
+from .bulk import bulk_delete, bulk_retitle
+from .forms import NoteBulkForm, NoteForm, NoteImportForm
+from .models import Note, NoteRevision
+from .ratelimit import RateLimitMixin
+from .rendering import render_markdown
+from .revisions import get_revision, restore_revision
+from .search import search_notes
+from .sync import get_changes
+from .transfer import export_jsonl, export_markdown_zip, import_notes
+
+EXPORT_FORMATS = {
+    'jsonl': (export_jsonl, 'application/x-ndjson', 'notes.jsonl'),
+    'md': (export_markdown_zip, 'application/zip', 'notes.zip'),
+}
 
 
 class Home(generic.TemplateView):
@@ -26,34 +45,197 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
+class NoteFormMixin:
+    """Сохранение формы заметки с защитой от гонки за slug."""
+    form_class = NoteForm
+
+    def form_valid(self, form):
+        try:
+            return super().form_valid(form)
+        except IntegrityError:
+            form.add_slug_taken_error()
+            return self.form_invalid(form)
+
+
+class NoteCreate(
+        NoteBase, RateLimitMixin, NoteFormMixin, generic.CreateView
+):
     """Добавление заметки."""
     template_name = 'notes/form.html'
-    form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
     template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
-    """Удаление заметки."""
+    """Удаление заметки (остаётся надгробие для синхронизации)."""
     template_name = 'notes/delete.html'
 
+    def form_valid(self, form):
+        self.object.soft_delete()
+        return HttpResponseRedirect(self.get_success_url())
+
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """
+    Список заметок пользователя, постранично.
+
+    Страница выбирается по ключу id (параметр after), а не по смещению,
+    поэтому время ответа не растёт с размером коллекции.
+    """
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        """Берём на одну заметку больше, чтобы узнать о продолжении."""
+        notes = super().get_queryset().only('id', 'slug', 'title')
+        after = self.request.GET.get('after')
+        if after:
+            # isdigit() пропускает символы вроде «²», которые int() не берёт.
+            try:
+                after = int(after)
+            except ValueError:
+                raise BadRequest('Некорректный параметр after.')
+            notes = notes.filter(id__gt=after)
+        return notes.order_by('id')[:settings.NOTES_COUNT_ON_LIST_PAGE + 1]
+
+    def get_context_data(self, **kwargs):
+        page = list(self.object_list)
+        next_after = None
+        if len(page) > settings.NOTES_COUNT_ON_LIST_PAGE:
+            page = page[:settings.NOTES_COUNT_ON_LIST_PAGE]
+            next_after = page[-1].id
+        self.object_list = page
+        context = super().get_context_data(object_list=page, **kwargs)
+        context['next_after'] = next_after
+        return context
+
+
+class NoteBulk(NoteBase, generic.FormView):
+    """
+    Удаление или смена заголовка у отмеченных в списке заметок.
+
+    Заметки берутся только из заметок пользователя, чужие id
+    молча пропускаются.
+    """
+    form_class = NoteBulkForm
+    template_name = 'notes/bulk.html'
+    http_method_names = ('post',)
+
+    def form_valid(self, form):
+        ids = form.cleaned_data['ids']
+        if form.cleaned_data['action'] == NoteBulkForm.DELETE:
+            bulk_delete(self.request.user, ids)
+        else:
+            bulk_retitle(self.request.user, ids, form.cleaned_data['title'])
+        return HttpResponseRedirect(self.success_url)
+
 
 class NoteDetail(NoteBase, generic.DetailView):
-    """Заметка подробно."""
+    """Заметка подробно, текст размечен Markdown."""
     template_name = 'notes/detail.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['text_html'] = render_markdown(self.object.text)
+        return context
+
+
+class NoteHistory(NoteBase, generic.DetailView):
+    """История версий заметки."""
+    template_name = 'notes/history.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['revisions'] = self.object.revisions.only(
+            'id', 'note_id', 'number', 'created', 'title'
+        )
+        return context
+
+
+class NoteRevisionRestore(NoteBase, generic.DetailView):
+    """Просмотр версии заметки и её восстановление."""
+    template_name = 'notes/revision.html'
+
+    def get_revision(self):
+        try:
+            return get_revision(self.object, self.kwargs['number'])
+        except NoteRevision.DoesNotExist:
+            raise Http404('Такой версии нет.')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['revision'] = self.get_revision()
+        return context
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        restore_revision(self.object, self.get_revision())
+        return HttpResponseRedirect(self.success_url)
+
+
+class NoteSearch(NoteBase, generic.TemplateView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        context['results'] = search_notes(self.request.user, query)
+        return context
+
+
+class NoteExport(NoteBase, generic.View):
+    """Выгрузка заметок пользователя потоком: ?format=jsonl или md."""
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'jsonl')
+        if export_format not in EXPORT_FORMATS:
+            raise BadRequest('Неизвестный формат выгрузки.')
+        export, content_type, filename = EXPORT_FORMATS[export_format]
+        return StreamingHttpResponse(
+            export(request.user),
+            content_type=content_type,
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"'
+            },
+        )
+
+
+class NoteImport(NoteBase, generic.FormView):
+    """Загрузка заметок из файла."""
+    template_name = 'notes/import.html'
+    form_class = NoteImportForm
+
+    def form_valid(self, form):
+        result = import_notes(self.request.user, form.cleaned_data['file'])
+        return self.render_to_response(
+            self.get_context_data(form=form, result=result)
+        )
+
+
+class NoteSync(NoteBase, generic.View):
+    """
+    Изменения заметок после курсора в JSON для клиентов синхронизации.
+
+    Клиент передаёт курсор из прошлого ответа в параметре cursor
+    и повторяет запрос, пока has_more истинно.
+    """
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        changes = get_changes(request.user, request.GET.get('cursor'))
+        response = JsonResponse(changes, json_dumps_params={
+            'ensure_ascii': False, 'separators': (',', ':'),
+        })
+        set_response_etag(response)
+        response['Cache-Control'] = 'private, no-cache'
+        return get_conditional_response(
+            request, etag=response['ETag'], response=response
+        )
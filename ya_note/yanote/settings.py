@@ -52,10 +52,32 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
+# Профиль SQLite для одновременных чтений и записей:
+# WAL не блокирует читателей во время записи, busy_timeout ждёт
+# освобождения блокировки вместо мгновенной ошибки «database is locked».
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA cache_size=-20000',
+    'PRAGMA mmap_size=134217728',
+    'PRAGMA temp_store=MEMORY',
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+            # Транзакция сразу берёт блокировку записи: без этого
+            # чтение с последующей записью ловит блокировку посреди
+            # транзакции, и busy_timeout уже не помогает.
+            # None вернёт стандартный режим DEFERRED.
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
@@ -87,3 +109,89 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 100
+
+NOTES_SEARCH_RESULTS = 50
+
+NOTES_SYNC_PAGE_SIZE = 500
+
+NOTES_SYNC_SETTLE_SECONDS = 2
+
+# Тексты заметок длиннее порога (в байтах) хранятся сжатыми.
+# Поисковый индекс хранит несжатую копию (см. notes.fields).
+NOTES_TEXT_COMPRESS_THRESHOLD = 1024
+
+# История заметок: каждая N-я версия хранится целиком, остальные —
+# разницей с предыдущей, так что восстановление читает не больше N
+# версий. Храним последние NOTES_REVISIONS_KEEP версий (и недостающие
+# до ближайшего снимка).
+NOTES_REVISION_SNAPSHOT_EVERY = 10
+NOTES_REVISIONS_KEEP = 50
+
+# Загрузка заметок из файла: размер пачки для bulk_create и предел
+# размера одной заметки в архиве Markdown (в байтах).
+NOTES_IMPORT_BATCH_SIZE = 500
+NOTES_IMPORT_MAX_NOTE_BYTES = 1024 * 1024
+
+# Кэш HTML заметок, размеченных Markdown. Число записей ограничено,
+# лишние вытесняются; в продакшене сюда подойдёт memcached или Redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'markdown': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'notes-markdown',
+        'OPTIONS': {'MAX_ENTRIES': 500},
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'sessions',
+    },
+    'users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'notes-users',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'ratelimit',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+NOTES_MARKDOWN_CACHE = 'markdown'
+NOTES_MARKDOWN_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Сессии читаются из кэша, а пишутся и в кэш, и в базу: после
+# перезапуска или вытеснения из кэша сессия загрузится из базы.
+# Кэш общий для всех процессов, иначе выход из аккаунта удалял бы
+# сессию только из кэша одного воркера; в продакшене — memcached
+# или Redis.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Пользователь запроса берётся из кэша процесса (см. notes.backends).
+# ModelBackend оставлен для сессий, созданных до его появления.
+AUTHENTICATION_BACKENDS = [
+    'notes.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+NOTES_USER_CACHE = 'users'
+NOTES_USER_CACHE_TIMEOUT = 30
+
+# Лимиты записей по имени URL (см. notes.ratelimit): для пользователя
+# и для IP — (ёмкость корзины, секунд на её наполнение). IP общий
+# у всех за одним NAT, поэтому его лимит шире.
+NOTES_RATE_LIMITS = {
+    'notes:add': {'user': (30, 60), 'ip': (90, 60)},
+}
+# Корзины общие для всех процессов, иначе у каждого воркера был бы
+# свой лимит. Им нужен атомарный incr: в файловом кэше он читает
+# и пишет файл отдельно, и при одновременных запросах лимит
+# приблизителен. В продакшене — memcached или Redis.
+NOTES_RATE_LIMIT_CACHE = 'ratelimit'
+
+# Массовые операции обрабатывают заметки пачками такого размера,
+# каждая пачка — короткая транзакция.
+NOTES_BULK_BATCH_SIZE = 200